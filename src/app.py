@@ -1,26 +1,58 @@
 """Flask 主程序"""
+import io
 import os
 import json
 import time
 import hmac
 import hashlib
 import base64
+import multiprocessing
 import urllib.parse
 from datetime import datetime
 import requests
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, send_from_directory
-from .models import Account, CheckinLog, Config, db, init_db
+from peewee import Case, Tuple, chunked, fn
+from flask import (
+    Flask,
+    Response,
+    render_template,
+    request,
+    jsonify,
+    session,
+    redirect,
+    url_for,
+    send_from_directory,
+    stream_with_context,
+)
+from .models import (
+    Account,
+    CheckinLog,
+    Config,
+    db,
+    init_db,
+    set_config,
+    invalidate_config_cache,
+    get_stats as get_cached_stats,
+    invalidate_stats_cache,
+    purge_orphan_snapshots,
+)
 from .auth import login_required, check_password
 from .scheduler import (
     start_scheduler,
     stop_scheduler,
     add_job,
+    add_jobs,
     remove_job,
+    remove_jobs,
     execute_checkin,
+    get_next_run_time,
+    invalidate_curl_cache,
+    job_options,
     parse_curl_command,
-    parse_random_cron
+    parse_random_cron,
+    validate_cron_expr
 )
 from .notifier import send_telegram, send_dingtalk, send_wecom, send_feishu, NOTIFY_CONFIG_KEYS
+from .notifier import dispatcher as notify_dispatcher, pending_retries
 
 # 获取项目根目录（src 的父目录）
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -33,11 +65,14 @@ app = Flask(
 )
 app.secret_key = os.getenv('SECRET_KEY', 'a8f5f167f44f4964e6c998dee827110c5b92c0f8d1e3a7b2c4f6e8d0a2b4c6e8')
 
-# 初始化数据库
-init_db()
+# process 签到引擎的子进程以 spawn 方式导入入口模块（如 run.py）时只需要 Flask 应用对象，
+# 不初始化数据库、不启动调度器
+if multiprocessing.current_process().name == 'MainProcess':
+    # 初始化数据库
+    init_db()
 
-# 启动调度器
-start_scheduler()
+    # 启动调度器
+    start_scheduler()
 
 
 @app.route('/favicon.ico')
@@ -87,12 +122,13 @@ def notify():
 @login_required
 def get_accounts():
     """获取账号列表"""
-    db.connect(reuse_if_open=True)
+    accounts = Account.select().order_by(Account.created_at.desc())
     
-    try:
-        accounts = Account.select().order_by(Account.created_at.desc())
-        
-        data = [{
+    data = []
+    for acc in accounts:
+        # 计划执行时间（随机窗口账号为本次抽取的具体时间）
+        next_run_time = get_next_run_time(acc.id, acc.cron_expr) if acc.enabled else None
+        data.append({
             'id': acc.id,
             'name': acc.name,
             'curl_command': acc.curl_command,
@@ -100,13 +136,44 @@ def get_accounts():
             'retry_count': acc.retry_count,
             'retry_interval': acc.retry_interval,
             'enabled': acc.enabled,
-            'created_at': acc.created_at.strftime('%Y-%m-%d %H:%M:%S')
-        } for acc in accounts]
-        
-        return jsonify({'success': True, 'data': data})
-        
-    finally:
-        db.close()
+            'misfire_grace_time': acc.misfire_grace_time,
+            'coalesce': acc.coalesce,
+            'max_instances': acc.max_instances,
+            'created_at': acc.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'next_run_time': next_run_time.strftime('%Y-%m-%d %H:%M:%S') if next_run_time else None
+        })
+    
+    return jsonify({'success': True, 'data': data})
+
+
+def _parse_job_options(data: dict) -> dict:
+    """读取定时任务执行策略字段（只返回请求中提供的字段），无效时抛出 ValueError"""
+    options = {}
+
+    if 'misfire_grace_time' in data:
+        value = data['misfire_grace_time']
+        if value in (None, ''):
+            options['misfire_grace_time'] = None  # 使用全局默认
+        else:
+            try:
+                options['misfire_grace_time'] = int(value)
+            except (TypeError, ValueError):
+                raise ValueError('misfire_grace_time 必须是整数')
+            if options['misfire_grace_time'] < 0:
+                raise ValueError('misfire_grace_time 不能为负数')
+
+    if 'coalesce' in data:
+        options['coalesce'] = bool(data['coalesce'])
+
+    if 'max_instances' in data:
+        try:
+            options['max_instances'] = int(data['max_instances'])
+        except (TypeError, ValueError):
+            raise ValueError('max_instances 必须是整数')
+        if options['max_instances'] < 1:
+            raise ValueError('max_instances 至少为 1')
+
+    return options
 
 
 @app.route('/api/accounts', methods=['POST'])
@@ -121,50 +188,51 @@ def create_account():
         if not data.get(field):
             return jsonify({'success': False, 'message': f'缺少必填字段: {field}'}), 400
     
-    db.connect(reuse_if_open=True)
-    
+    # 验证 curl 命令
     try:
-        # 验证 curl 命令
-        try:
-            parse_curl_command(data['curl_command'])
-        except ValueError as e:
-            return jsonify({'success': False, 'message': str(e)}), 400
-
-        # 验证 Cron 表达式（在创建账号前）
-        if data.get('enabled', True):
-            try:
-                # 使用 parse_random_cron 验证（支持随机语法）
-                parse_random_cron(data['cron_expr'])
-            except Exception as e:
-                return jsonify({'success': False, 'message': f'Cron 表达式错误: {e}'}), 400
+        parse_curl_command(data['curl_command'])
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
 
-        # 创建账号
-        account = Account.create(
-            name=data['name'],
-            curl_command=data['curl_command'],
-            cron_expr=data['cron_expr'],
-            retry_count=data.get('retry_count', 3),
-            retry_interval=data.get('retry_interval', 60),
-            enabled=data.get('enabled', True)
-        )
+    try:
+        options = _parse_job_options(data)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
 
-        # 添加定时任务
-        if account.enabled:
-            try:
-                add_job(account.id, account.cron_expr)
-            except Exception as e:
-                # 如果添加任务失败，删除已创建的账号
-                account.delete_instance()
-                return jsonify({'success': False, 'message': f'Cron 表达式错误: {e}'}), 400
-        
-        return jsonify({
-            'success': True,
-            'message': '账号创建成功',
-            'data': {'id': account.id}
-        })
-        
-    finally:
-        db.close()
+    # 验证 Cron 表达式（在创建账号前）
+    if data.get('enabled', True):
+        try:
+            # 使用 parse_random_cron 验证（支持随机语法）
+            parse_random_cron(data['cron_expr'])
+        except Exception as e:
+            return jsonify({'success': False, 'message': f'Cron 表达式错误: {e}'}), 400
+
+    # 创建账号
+    account = Account.create(
+        name=data['name'],
+        curl_command=data['curl_command'],
+        cron_expr=data['cron_expr'],
+        retry_count=data.get('retry_count', 3),
+        retry_interval=data.get('retry_interval', 60),
+        enabled=data.get('enabled', True),
+        **options
+    )
+    invalidate_stats_cache()
+
+    # 添加定时任务
+    if account.enabled:
+        try:
+            add_job(account.id, account.cron_expr, account.updated_at, job_options(account))
+        except Exception as e:
+            # 如果添加任务失败，删除已创建的账号
+            account.delete_instance()
+            return jsonify({'success': False, 'message': f'Cron 表达式错误: {e}'}), 400
+    
+    return jsonify({
+        'success': True,
+        'message': '账号创建成功',
+        'data': {'id': account.id}
+    })
 
 
 @app.route('/api/accounts/<int:account_id>', methods=['PUT'])
@@ -173,8 +241,6 @@ def update_account(account_id):
     """更新账号"""
     data = request.get_json()
     
-    db.connect(reuse_if_open=True)
-    
     try:
         account = Account.get_by_id(account_id)
         
@@ -184,11 +250,18 @@ def update_account(account_id):
                 parse_curl_command(data['curl_command'])
             except ValueError as e:
                 return jsonify({'success': False, 'message': str(e)}), 400
+
+        try:
+            options = _parse_job_options(data)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
         
         # 更新字段
         if 'name' in data:
             account.name = data['name']
-        if 'curl_command' in data:
+        if 'curl_command' in data and data['curl_command'] != account.curl_command:
+            # 旧命令的解析结果不再需要
+            invalidate_curl_cache(account.curl_command)
             account.curl_command = data['curl_command']
         if 'cron_expr' in data:
             account.cron_expr = data['cron_expr']
@@ -198,13 +271,16 @@ def update_account(account_id):
             account.retry_interval = data['retry_interval']
         if 'enabled' in data:
             account.enabled = data['enabled']
+        for field, value in options.items():
+            setattr(account, field, value)
         
         account.save()
+        invalidate_stats_cache()
         
         # 更新定时任务
         if account.enabled:
             try:
-                add_job(account.id, account.cron_expr)
+                add_job(account.id, account.cron_expr, account.updated_at, job_options(account))
             except Exception as e:
                 return jsonify({'success': False, 'message': f'Cron 表达式错误: {e}'}), 400
         else:
@@ -214,16 +290,12 @@ def update_account(account_id):
         
     except Account.DoesNotExist:
         return jsonify({'success': False, 'message': '账号不存在'}), 404
-    finally:
-        db.close()
 
 
 @app.route('/api/accounts/<int:account_id>', methods=['DELETE'])
 @login_required
 def delete_account(account_id):
     """删除账号"""
-    db.connect(reuse_if_open=True)
-
     try:
         account = Account.get_by_id(account_id)
 
@@ -232,21 +304,135 @@ def delete_account(account_id):
 
         # 删除账号（级联删除日志）
         account.delete_instance()
+        invalidate_curl_cache(account.curl_command)
+        invalidate_stats_cache()
 
         return jsonify({'success': True, 'message': '账号删除成功'})
 
     except Account.DoesNotExist:
         return jsonify({'success': False, 'message': '账号不存在'}), 404
-    finally:
-        db.close()
+
+
+# 批量操作: action -> 显示名称
+BULK_ACTIONS = {
+    'enable': '启用',
+    'disable': '禁用',
+    'delete': '删除',
+    'set_cron': '修改 Cron 表达式',
+}
+
+
+def _bulk_condition(data: dict):
+    """
+    根据 ids 或 filter 构造批量操作的账号筛选条件，参数无效时抛出 ValueError
+
+    filter 支持: enabled（布尔）、name_contains（名称包含）、cron_expr（完全匹配）；
+    空的 filter（{}）表示全部账号。
+    """
+    if 'ids' in data:
+        ids = data['ids']
+        if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+            raise ValueError('ids 必须是整数数组')
+        if len(ids) > SQLITE_MAX_VARIABLES:
+            raise ValueError(f'ids 最多 {SQLITE_MAX_VARIABLES} 个，更多账号请使用 filter')
+        return Account.id.in_(ids)
+
+    filters = data.get('filter')
+    if not isinstance(filters, dict):
+        raise ValueError('缺少 ids 或 filter 参数')
+
+    unknown = set(filters) - {'enabled', 'name_contains', 'cron_expr'}
+    if unknown:
+        raise ValueError(f"未知筛选条件: {', '.join(sorted(unknown))}")
+
+    condition = Account.id.is_null(False)
+    if 'enabled' in filters:
+        condition &= (Account.enabled == bool(filters['enabled']))
+    if filters.get('name_contains'):
+        condition &= Account.name.contains(filters['name_contains'])
+    if filters.get('cron_expr'):
+        condition &= (Account.cron_expr == filters['cron_expr'])
+    return condition
+
+
+@app.route('/api/accounts/bulk', methods=['POST'])
+@login_required
+def bulk_update_accounts():
+    """
+    批量操作账号（一个事务内完成，定时任务批量更新）
+
+    请求体:
+        action: enable / disable / delete / set_cron
+        ids: 账号 ID 数组，或 filter: 筛选条件（见 _bulk_condition）
+        cron_expr: 新的 Cron 表达式（action 为 set_cron 时必填）
+    """
+    data = request.get_json(silent=True) or {}
+    action = data.get('action')
+
+    if action not in BULK_ACTIONS:
+        return jsonify({'success': False, 'message': f"action 必须是: {', '.join(BULK_ACTIONS)}"}), 400
+
+    try:
+        condition = _bulk_condition(data)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    cron_expr = data.get('cron_expr')
+    if action == 'set_cron':
+        if not cron_expr:
+            return jsonify({'success': False, 'message': '缺少必填字段: cron_expr'}), 400
+        try:
+            validate_cron_expr(cron_expr)
+        except Exception as e:
+            return jsonify({'success': False, 'message': f'Cron 表达式错误: {e}'}), 400
+
+    # 先读后写：IMMEDIATE 事务在开始时就取得写锁，避免 WAL 下与签到日志写入冲突（SQLITE_BUSY_SNAPSHOT）
+    with db.atomic('IMMEDIATE'):
+        accounts = list(Account.select().where(condition))
+        ids = [acc.id for acc in accounts]
+        updated_at = datetime.now()
+
+        # 写入沿用同一筛选条件，不按匹配到的 ID 逐个绑定参数
+        if ids:
+            if action == 'delete':
+                Account.delete().where(condition).execute()
+            elif action == 'set_cron':
+                Account.update(cron_expr=cron_expr, updated_at=updated_at).where(condition).execute()
+            else:
+                Account.update(enabled=(action == 'enable'), updated_at=updated_at).where(condition).execute()
+
+    invalidate_stats_cache()
+
+    # 事务提交后批量更新定时任务
+    job_errors = {}
+    if action in ('delete', 'disable'):
+        remove_jobs(ids)
+        if action == 'delete':
+            for acc in accounts:
+                invalidate_curl_cache(acc.curl_command)
+    else:
+        for acc in accounts:
+            acc.updated_at = updated_at
+            if action == 'set_cron':
+                acc.cron_expr = cron_expr
+        job_errors = add_jobs([acc for acc in accounts if action == 'enable' or acc.enabled])
+
+    message = f'{BULK_ACTIONS[action]}完成，共 {len(ids)} 个账号'
+    if job_errors:
+        message += f'，{len(job_errors)} 个账号的定时任务添加失败'
+
+    return jsonify({
+        'success': True,
+        'message': message,
+        'affected': len(ids),
+        'job_errors': job_errors
+    })
 
 
 @app.route('/api/accounts/<int:account_id>/preview', methods=['GET'])
 @login_required
 def preview_account_request(account_id):
     """预览账号的请求详情"""
-    db.connect(reuse_if_open=True)
-
     try:
         account = Account.get_by_id(account_id)
 
@@ -268,237 +454,426 @@ def preview_account_request(account_id):
         return jsonify({'success': False, 'message': '账号不存在'}), 404
     except Exception as e:
         return jsonify({'success': False, 'message': f'解析失败: {str(e)}'}), 400
-    finally:
-        db.close()
+
+
+# 导出字段（不包括 id 和 created_at）
+ACCOUNT_EXPORT_FIELDS = ('name', 'curl_command', 'cron_expr', 'retry_count', 'retry_interval', 'enabled',
+                         'misfire_grace_time', 'coalesce', 'max_instances')
+
+# 导入时每批写入的账号数（一个事务）
+IMPORT_CHUNK_SIZE = 500
+
+# 单条 SQL 语句的绑定参数上限（SQLite 3.32 之前为 999）
+SQLITE_MAX_VARIABLES = 999
 
 
 @app.route('/api/accounts/export', methods=['GET'])
 @login_required
 def export_accounts():
-    """导出所有账号"""
-    db.connect(reuse_if_open=True)
+    """
+    导出所有账号（流式输出，不在内存中构建完整列表）
+
+    - 默认：JSON，格式为 {"success": true, "data": [...]}
+    - format=ndjson：每行一个账号 JSON，可直接用于导入
+    """
+    ndjson = request.args.get('format') == 'ndjson'
+    accounts = (Account
+                .select(*[getattr(Account, field) for field in ACCOUNT_EXPORT_FIELDS])
+                .order_by(Account.id)
+                .dicts()
+                .iterator())
+
+    def generate():
+        if ndjson:
+            for acc in accounts:
+                yield json.dumps(acc, ensure_ascii=False) + '\n'
+            return
+
+        yield '{"success": true, "data": ['
+        for idx, acc in enumerate(accounts):
+            yield (',' if idx else '') + json.dumps(acc, ensure_ascii=False)
+        yield ']}'
+
+    if ndjson:
+        filename = f"acgo_accounts_{datetime.now().strftime('%Y-%m-%d')}.ndjson"
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                        headers={'Content-Disposition': f'attachment; filename={filename}'})
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+
+def _iter_import_records():
+    """
+    逐条读取导入数据，返回 (序号, 账号数据或解析错误)
+
+    - Content-Type 为 application/x-ndjson 时按行流式解析请求体
+    - 否则读取 JSON 请求体 {"accounts": [...]}（兼容旧版），格式错误时抛出 ValueError
+    """
+    if request.mimetype == 'application/x-ndjson':
+        idx = 0
+        for line in io.BufferedReader(request.stream):
+            line = line.strip()
+            if not line:
+                continue
+            idx += 1
+            try:
+                yield idx, json.loads(line)
+            except ValueError as e:
+                yield idx, ValueError(f'JSON 格式错误: {e}')
+        return
 
-    try:
-        accounts = Account.select()
+    data = request.get_json(silent=True)
+    if not data or 'accounts' not in data:
+        raise ValueError('缺少 accounts 参数')
+    if not isinstance(data['accounts'], list):
+        raise ValueError('accounts 必须是数组')
 
-        # 转换为可导出的格式（排除 id 和 created_at）
-        export_data = []
-        for acc in accounts:
-            export_data.append({
-                'name': acc.name,
-                'curl_command': acc.curl_command,
-                'cron_expr': acc.cron_expr,
-                'retry_count': acc.retry_count,
-                'retry_interval': acc.retry_interval,
-                'enabled': acc.enabled
-            })
+    for idx, acc_data in enumerate(data['accounts'], start=1):
+        yield idx, acc_data
 
-        return jsonify({
-            'success': True,
-            'data': export_data
-        })
 
-    finally:
-        db.close()
+def _validate_import_record(acc_data) -> dict:
+    """校验一条导入数据，返回待写入的字段，无效时抛出 ValueError"""
+    if isinstance(acc_data, Exception):
+        raise acc_data
+    if not isinstance(acc_data, dict):
+        raise ValueError('账号数据必须是对象')
 
+    # 验证必填字段
+    for field in ('name', 'curl_command'):
+        if field not in acc_data or not acc_data[field]:
+            raise ValueError(f'缺少必填字段: {field}')
 
-@app.route('/api/accounts/import', methods=['POST'])
-@login_required
-def import_accounts():
-    """导入账号"""
-    data = request.get_json()
+    # 验证 curl 命令
+    try:
+        parse_curl_command(acc_data['curl_command'])
+    except ValueError as e:
+        raise ValueError(f'curl 命令无效: {e}')
+
+    record = {
+        'name': acc_data['name'],
+        'curl_command': acc_data['curl_command'],
+        'cron_expr': acc_data.get('cron_expr', '0 8 * * *'),
+        'retry_count': acc_data.get('retry_count', 3),
+        'retry_interval': acc_data.get('retry_interval', 60),
+        'enabled': acc_data.get('enabled', True),
+        'misfire_grace_time': None,
+        'coalesce': True,
+        'max_instances': 1
+    }
+    record.update(_parse_job_options(acc_data))
 
-    if not data or 'accounts' not in data:
-        return jsonify({'success': False, 'message': '缺少 accounts 参数'}), 400
+    # 启用的账号需要合法的 Cron 表达式（写入前校验，避免写入后再回滚）
+    if record['enabled']:
+        try:
+            validate_cron_expr(record['cron_expr'])
+        except Exception as e:
+            raise ValueError(f'Cron 表达式错误: {e}')
 
-    accounts = data['accounts']
+    return record
 
-    if not isinstance(accounts, list):
-        return jsonify({'success': False, 'message': 'accounts 必须是数组'}), 400
 
-    db.connect(reuse_if_open=True)
+def _import_chunk(records: list) -> list:
+    """
+    在一个事务中批量写入一批账号，并批量注册定时任务
 
-    try:
-        imported = 0
-        failed = 0
-        renamed = 0
-        errors = []
+    Returns:
+        添加定时任务失败（已删除）的账号名称和错误信息 [(名称, 错误), ...]
+    """
+    with db.atomic():
+        # peewee 会为有默认值的字段补齐列，按模型的全部字段数计算每条 INSERT 的行数
+        for batch in chunked(records, SQLITE_MAX_VARIABLES // len(Account._meta.fields)):
+            Account.insert_many(batch).execute()
+        created = list(Account
+                       .select(Account.id, Account.name, Account.cron_expr, Account.updated_at,
+                               Account.misfire_grace_time, Account.coalesce, Account.max_instances)
+                       .where(Account.name.in_([r['name'] for r in records]) & (Account.enabled == True)))
 
-        # 获取现有账号名称
-        existing_names = set(acc.name for acc in Account.select(Account.name))
+    job_errors = add_jobs(created)
+    if job_errors:
+        Account.delete().where(Account.id.in_(list(job_errors))).execute()
 
-        for idx, acc_data in enumerate(accounts):
-            try:
-                # 验证必填字段
-                required_fields = ['name', 'curl_command']
-                for field in required_fields:
-                    if field not in acc_data or not acc_data[field]:
-                        raise ValueError(f'缺少必填字段: {field}')
-
-                # 验证 curl 命令
-                try:
-                    parse_curl_command(acc_data['curl_command'])
-                except ValueError as e:
-                    raise ValueError(f'curl 命令无效: {e}')
-
-                # 处理重名账号（自动重命名）
-                original_name = acc_data['name']
-                account_name = original_name
-                counter = 1
-
-                while account_name in existing_names:
-                    account_name = f"{original_name}_导入{counter}"
-                    counter += 1
-                    renamed += 1
-
-                # 添加到已存在名称集合
-                existing_names.add(account_name)
-
-                # 创建账号
-                account = Account.create(
-                    name=account_name,
-                    curl_command=acc_data['curl_command'],
-                    cron_expr=acc_data.get('cron_expr', '0 8 * * *'),
-                    retry_count=acc_data.get('retry_count', 3),
-                    retry_interval=acc_data.get('retry_interval', 60),
-                    enabled=acc_data.get('enabled', True)
-                )
+    names = {acc.id: acc.name for acc in created}
+    return [(names[account_id], error) for account_id, error in job_errors.items()]
 
-                # 添加定时任务
-                if account.enabled:
-                    try:
-                        add_job(account.id, account.cron_expr)
-                    except Exception as e:
-                        # 如果添加任务失败，删除账号并记录错误
-                        account.delete_instance()
-                        raise ValueError(f'Cron 表达式错误: {e}')
 
-                imported += 1
+@app.route('/api/accounts/import', methods=['POST'])
+@login_required
+def import_accounts():
+    """
+    导入账号
+
+    支持 JSON（{"accounts": [...]}）和 NDJSON（Content-Type: application/x-ndjson，每行一个账号）。
+    NDJSON 请求体按行流式解析；账号每 IMPORT_CHUNK_SIZE 个在一个事务中批量写入。
+    """
+    imported = 0
+    failed = 0
+    renamed = 0
+    errors = []
+
+    # 获取现有账号名称
+    existing_names = set(acc.name for acc in Account.select(Account.name))
+    chunk = []
+
+    def flush():
+        nonlocal imported, failed
+        if not chunk:
+            return
+        job_errors = _import_chunk(chunk)
+        imported += len(chunk) - len(job_errors)
+        failed += len(job_errors)
+        errors.extend(f'账号 {name}: Cron 表达式错误: {error}' for name, error in job_errors)
+        chunk.clear()
 
-            except Exception as e:
+    try:
+        for idx, acc_data in _iter_import_records():
+            try:
+                record = _validate_import_record(acc_data)
+            except ValueError as e:
                 failed += 1
-                errors.append(f'第 {idx + 1} 个账号: {str(e)}')
+                errors.append(f'第 {idx} 个账号: {str(e)}')
+                continue
 
-        # 构造响应消息
-        message = f'导入完成：成功 {imported} 个，失败 {failed} 个'
-        if renamed > 0:
-            message += f'，重命名 {renamed} 个'
+            # 处理重名账号（自动重命名）
+            original_name = record['name']
+            counter = 1
+            while record['name'] in existing_names:
+                record['name'] = f"{original_name}_导入{counter}"
+                counter += 1
+            if record['name'] != original_name:
+                renamed += 1
 
-        if errors:
-            message += f'\n\n错误详情:\n' + '\n'.join(errors[:5])  # 最多显示 5 个错误
-            if len(errors) > 5:
-                message += f'\n... 还有 {len(errors) - 5} 个错误'
+            # 添加到已存在名称集合
+            existing_names.add(record['name'])
 
-        return jsonify({
-            'success': True,
-            'message': message,
-            'imported': imported,
-            'failed': failed,
-            'renamed': renamed
-        })
+            chunk.append(record)
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                flush()
+
+        flush()
+
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
 
     finally:
-        db.close()
+        invalidate_stats_cache()
+
+    # 构造响应消息
+    message = f'导入完成：成功 {imported} 个，失败 {failed} 个'
+    if renamed > 0:
+        message += f'，重命名 {renamed} 个'
 
+    if errors:
+        message += f'\n\n错误详情:\n' + '\n'.join(errors[:5])  # 最多显示 5 个错误
+        if len(errors) > 5:
+            message += f'\n... 还有 {len(errors) - 5} 个错误'
+
+    return jsonify({
+        'success': True,
+        'message': message,
+        'imported': imported,
+        'failed': failed,
+        'renamed': renamed
+    })
 
 
 @app.route('/api/checkin/<int:account_id>', methods=['POST'])
 @login_required
 def manual_checkin(account_id):
     """手动立即签到"""
-    db.connect(reuse_if_open=True)
-
     try:
         account = Account.get_by_id(account_id)
 
         # 执行签到（手动签到时跳过禁用状态检查）
         result = execute_checkin(account_id, skip_enabled_check=True)
 
+        messages = {
+            'success': '签到成功',
+            'retrying': f"签到失败，已安排第 {result.get('retry_attempt')} 次重试（{account.retry_interval} 秒后）"
+        }
+
         return jsonify({
             'success': result['status'] == 'success',
-            'message': '签到成功' if result['status'] == 'success' else '签到失败',
+            'message': messages.get(result['status'], '签到失败'),
             'data': result
         })
 
     except Account.DoesNotExist:
         return jsonify({'success': False, 'message': '账号不存在'}), 404
-    finally:
-        db.close()
 
 
-@app.route('/api/logs', methods=['GET'])
-@login_required
-def get_logs():
-    """获取签到日志"""
-    page = int(request.args.get('page', 1))
-    page_size = int(request.args.get('page_size', 50))
-    status_filter = request.args.get('status', '')  # 状态筛选：'' (全部) / 'success' / 'failed'
+# 日志列表中响应内容的预览长度（完整内容通过 /api/logs/<id> 获取）
+LOG_PREVIEW_LENGTH = 100
+
+# 日志列表可选字段（fields 参数），默认返回除 response_body 以外的全部字段
+LOG_LIST_FIELDS = ('id', 'account_name', 'status', 'response_code', 'response_preview',
+                   'response_truncated', 'error_message', 'executed_at')
+LOG_OPTIONAL_FIELDS = ('response_body',)
+
+
+def _encode_log_cursor(log: CheckinLog) -> str:
+    """生成分页游标（最后一条记录的执行时间和 ID）"""
+    raw = f"{log.executed_at.isoformat(sep=' ')}|{log.id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
 
-    db.connect(reuse_if_open=True)
 
+def _decode_log_cursor(cursor: str):
+    """解析分页游标，返回 (执行时间, ID)，格式错误时抛出 ValueError"""
     try:
-        # 构建查询
-        query = (CheckinLog
-                 .select(CheckinLog, Account)
-                 .join(Account)
-                 .order_by(CheckinLog.executed_at.desc()))
+        executed_at, log_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|')
+        return datetime.fromisoformat(executed_at), int(log_id)
+    except Exception:
+        raise ValueError('无效的分页游标')
 
-        # 应用状态筛选
-        if status_filter:
-            query = query.where(CheckinLog.status == status_filter)
 
-        # 分页查询
+@app.route('/api/logs', methods=['GET'])
+@login_required
+def get_logs():
+    """
+    获取签到日志
+
+    支持两种分页方式：
+    - 游标分页（推荐）：传 cursor 参数（首页传空值），按 (executed_at, id) 定位，
+      翻到多深都是常数时间；响应中的 next_cursor 用于获取下一页（没有更多时为 null）
+    - 页码分页（兼容旧版）：传 page 参数，深度翻页时需要跳过前面所有记录
+
+    总数需要额外的 COUNT 查询：游标分页默认不返回，传 with_total=1 时返回
+
+    列表只返回响应内容的前 LOG_PREVIEW_LENGTH 个字符（response_preview），
+    可用 fields 参数选择字段（如 fields=id,status,response_body）
+    """
+    fields_param = request.args.get('fields', '')
+    if fields_param:
+        fields = {f.strip() for f in fields_param.split(',') if f.strip()} | {'id'}
+        unknown = fields - set(LOG_LIST_FIELDS) - set(LOG_OPTIONAL_FIELDS)
+        if unknown:
+            return jsonify({'success': False, 'message': f"未知字段: {', '.join(sorted(unknown))}"}), 400
+    else:
+        fields = set(LOG_LIST_FIELDS)
+
+    page_size = int(request.args.get('page_size', 50))
+    status_filter = request.args.get('status', '')  # 状态筛选：'' (全部) / 'success' / 'failed'
+    use_cursor = 'cursor' in request.args
+    with_total = request.args.get('with_total', '0' if use_cursor else '1') == '1'
+
+    # 只查询需要的列：未压缩的响应内容在 SQL 中截取预览，压缩的内容（BLOB）取出后解压截取
+    preview_column = Case(None, [
+        (fn.TYPEOF(CheckinLog.response_body) == 'text', fn.SUBSTR(CheckinLog.response_body, 1, LOG_PREVIEW_LENGTH + 1))
+    ], CheckinLog.response_body)
+    columns = [CheckinLog.id, CheckinLog.status, CheckinLog.response_code, CheckinLog.error_message,
+               CheckinLog.executed_at, Account.name, preview_column.alias('response_preview')]
+    if 'response_body' in fields:
+        columns.append(CheckinLog.response_body)
+
+    # 构建查询（id 作为同一时间多条记录的排序依据，保证游标定位唯一）
+    query = (CheckinLog
+             .select(*columns)
+             .join(Account)
+             .order_by(CheckinLog.executed_at.desc(), CheckinLog.id.desc()))
+
+    # 应用状态筛选
+    if status_filter:
+        query = query.where(CheckinLog.status == status_filter)
+
+    result = {'success': True, 'page_size': page_size}
+
+    if use_cursor:
+        cursor = request.args.get('cursor', '')
+        if cursor:
+            try:
+                executed_at, log_id = _decode_log_cursor(cursor)
+            except ValueError as e:
+                return jsonify({'success': False, 'message': str(e)}), 400
+            query = query.where(Tuple(CheckinLog.executed_at, CheckinLog.id) < Tuple(executed_at, log_id))
+
+        # 多取一条用于判断是否还有下一页
+        logs = list(query.limit(page_size + 1))
+        has_more = len(logs) > page_size
+        logs = logs[:page_size]
+        result['next_cursor'] = _encode_log_cursor(logs[-1]) if has_more else None
+    else:
+        page = int(request.args.get('page', 1))
         logs = query.paginate(page, page_size)
+        result['page'] = page
 
-        # 总数（根据筛选条件）
+    # 总数（根据筛选条件）
+    if with_total:
         if status_filter:
-            total = CheckinLog.select().where(CheckinLog.status == status_filter).count()
+            result['total'] = CheckinLog.select().where(CheckinLog.status == status_filter).count()
         else:
-            total = CheckinLog.select().count()
+            result['total'] = CheckinLog.select().count()
 
-        data = [{
+    data = []
+    for log in logs:
+        preview = CheckinLog.response_body.python_value(log.response_preview)
+        item = {
             'id': log.id,
             'account_name': log.account.name,
             'status': log.status,
             'response_code': log.response_code,
-            'response_body': log.response_body,  # 返回完整内容
+            'response_preview': preview[:LOG_PREVIEW_LENGTH] if preview else preview,
+            'response_truncated': bool(preview) and len(preview) > LOG_PREVIEW_LENGTH,
             'error_message': log.error_message,
             'executed_at': log.executed_at.strftime('%Y-%m-%d %H:%M:%S')
-        } for log in logs]
+        }
+        if 'response_body' in fields:
+            item['response_body'] = log.response_body
+        data.append({key: value for key, value in item.items() if key in fields})
 
-        return jsonify({
-            'success': True,
-            'data': data,
-            'total': total,
-            'page': page,
-            'page_size': page_size
-        })
+    result['data'] = data
+    return jsonify(result)
 
-    finally:
-        db.close()
+
+@app.route('/api/logs/<int:log_id>', methods=['GET'])
+@login_required
+def get_log_detail(log_id):
+    """获取单条日志的完整内容（包括完整的响应内容）"""
+    log = (CheckinLog
+           .select(CheckinLog, Account.name)
+           .join(Account)
+           .where(CheckinLog.id == log_id)
+           .first())
+    if not log:
+        return jsonify({'success': False, 'message': '日志不存在'}), 404
+
+    return jsonify({
+        'success': True,
+        'data': {
+            'id': log.id,
+            'account_name': log.account.name,
+            'status': log.status,
+            'response_code': log.response_code,
+            'response_body': log.response_body,
+            'error_message': log.error_message,
+            'executed_at': log.executed_at.strftime('%Y-%m-%d %H:%M:%S')
+        }
+    })
 
 
 @app.route('/api/logs/<int:log_id>/preview', methods=['GET'])
 @login_required
 def preview_log_request(log_id):
     """预览日志的请求详情"""
-    db.connect(reuse_if_open=True)
-
     try:
         log = CheckinLog.get_by_id(log_id)
 
-        # 解析 JSON 字符串
-        headers = json.loads(log.request_headers) if log.request_headers else {}
-        cookies = json.loads(log.request_cookies) if log.request_cookies else {}
+        # 新记录从请求快照读取，未迁移的旧记录读取原字段
+        snapshot = log.request_snapshot if log.request_snapshot_id else None
+        if snapshot:
+            method, url, headers, cookies, body = (snapshot.method, snapshot.url, snapshot.headers,
+                                                   snapshot.cookies, snapshot.data)
+        else:
+            method, url, headers, cookies, body = (log.request_method, log.request_url, log.request_headers,
+                                                   log.request_cookies, log.request_data)
 
         return jsonify({
             'success': True,
             'data': {
-                'method': log.request_method,
-                'url': log.request_url,
-                'headers': headers,
-                'cookies': cookies,
-                'data': log.request_data
+                'method': method,
+                'url': url,
+                # 解析 JSON 字符串
+                'headers': json.loads(headers) if headers else {},
+                'cookies': json.loads(cookies) if cookies else {},
+                'data': body
             }
         })
 
@@ -506,34 +881,16 @@ def preview_log_request(log_id):
         return jsonify({'success': False, 'message': '日志不存在'}), 404
     except Exception as e:
         return jsonify({'success': False, 'message': f'获取详情失败: {str(e)}'}), 400
-    finally:
-        db.close()
 
 
 @app.route('/api/stats', methods=['GET'])
 @login_required
 def get_stats():
     """获取统计数据"""
-    db.connect(reuse_if_open=True)
-
-    try:
-        total_accounts = Account.select().count()
-        enabled_accounts = Account.select().where(Account.enabled == True).count()
-        total_logs = CheckinLog.select().count()
-        success_logs = CheckinLog.select().where(CheckinLog.status == 'success').count()
-
-        return jsonify({
-            'success': True,
-            'data': {
-                'total_accounts': total_accounts,
-                'enabled_accounts': enabled_accounts,
-                'total_logs': total_logs,
-                'success_logs': success_logs
-            }
-        })
-
-    finally:
-        db.close()
+    return jsonify({
+        'success': True,
+        'data': get_cached_stats()
+    })
 
 
 @app.route('/api/logs/clear', methods=['DELETE'])
@@ -542,62 +899,54 @@ def clear_logs():
     """清除签到日志"""
     days = request.args.get('days', type=int)
 
-    db.connect(reuse_if_open=True)
+    if days:
+        # 清除N天前的日志
+        from datetime import datetime, timedelta
+        cutoff_date = datetime.now() - timedelta(days=days)
 
-    try:
-        if days:
-            # 清除N天前的日志
-            from datetime import datetime, timedelta
-            cutoff_date = datetime.now() - timedelta(days=days)
+        deleted = CheckinLog.delete().where(
+            CheckinLog.executed_at < cutoff_date
+        ).execute()
+        invalidate_stats_cache()
+        purge_orphan_snapshots()
 
-            deleted = CheckinLog.delete().where(
-                CheckinLog.executed_at < cutoff_date
-            ).execute()
-
-            return jsonify({
-                'success': True,
-                'message': f'已清除 {deleted} 条 {days} 天前的记录'
-            })
-        else:
-            # 清除全部日志
-            deleted = CheckinLog.delete().execute()
-
-            return jsonify({
-                'success': True,
-                'message': f'已清除全部 {deleted} 条记录'
-            })
+        return jsonify({
+            'success': True,
+            'message': f'已清除 {deleted} 条 {days} 天前的记录'
+        })
+    else:
+        # 清除全部日志
+        deleted = CheckinLog.delete().execute()
+        invalidate_stats_cache()
+        purge_orphan_snapshots()
 
-    finally:
-        db.close()
+        return jsonify({
+            'success': True,
+            'message': f'已清除全部 {deleted} 条记录'
+        })
 
 
 @app.route('/api/webhook/config', methods=['GET'])
 @login_required
 def get_webhook_config():
     """获取 Webhook 配置"""
-    db.connect(reuse_if_open=True)
-
-    try:
-        # 获取配置
-        enabled_config = Config.get_or_none(Config.key == 'webhook_enabled')
-        include_response_config = Config.get_or_none(Config.key == 'webhook_include_response')
-        url_config = Config.get_or_none(Config.key == 'webhook_url')
-        method_config = Config.get_or_none(Config.key == 'webhook_method')
-        headers_config = Config.get_or_none(Config.key == 'webhook_headers')
-
-        return jsonify({
-            'success': True,
-            'data': {
-                'enabled': enabled_config.value == 'true' if enabled_config else False,
-                'include_response': include_response_config.value == 'true' if include_response_config else False,
-                'url': url_config.value if url_config else '',
-                'method': method_config.value if method_config else 'POST',
-                'headers': headers_config.value if headers_config else ''
-            }
-        })
+    # 获取配置
+    enabled_config = Config.get_or_none(Config.key == 'webhook_enabled')
+    include_response_config = Config.get_or_none(Config.key == 'webhook_include_response')
+    url_config = Config.get_or_none(Config.key == 'webhook_url')
+    method_config = Config.get_or_none(Config.key == 'webhook_method')
+    headers_config = Config.get_or_none(Config.key == 'webhook_headers')
 
-    finally:
-        db.close()
+    return jsonify({
+        'success': True,
+        'data': {
+            'enabled': enabled_config.value == 'true' if enabled_config else False,
+            'include_response': include_response_config.value == 'true' if include_response_config else False,
+            'url': url_config.value if url_config else '',
+            'method': method_config.value if method_config else 'POST',
+            'headers': headers_config.value if headers_config else ''
+        }
+    })
 
 
 @app.route('/api/webhook/config', methods=['POST'])
@@ -606,8 +955,6 @@ def save_webhook_config():
     """保存 Webhook 配置"""
     data = request.get_json()
 
-    db.connect(reuse_if_open=True)
-
     try:
         # Webhook 配置项
         webhook_configs = {
@@ -618,20 +965,11 @@ def save_webhook_config():
             'webhook_headers': data.get('headers', '')
         }
 
-        # 保存或创建配置
-        for key, value in webhook_configs.items():
-            config = Config.get_or_none(Config.key == key)
-            if config:
-                Config.update(
-                    value=value,
-                    updated_at=datetime.now()
-                ).where(Config.key == key).execute()
-            else:
-                Config.create(
-                    key=key,
-                    value=value,
-                    updated_at=datetime.now()
-                )
+        # 保存或创建配置（事务提交后配置缓存立即失效）
+        with db.atomic():
+            for key, value in webhook_configs.items():
+                set_config(key, value, invalidate=False)
+        invalidate_config_cache()
 
         return jsonify({
             'success': True,
@@ -641,16 +979,11 @@ def save_webhook_config():
     except Exception as e:
         return jsonify({'success': False, 'message': f'保存失败: {str(e)}'}), 500
 
-    finally:
-        db.close()
-
 
 @app.route('/api/webhook/test', methods=['POST'])
 @login_required
 def test_webhook():
     """测试 Webhook"""
-    db.connect(reuse_if_open=True)
-
     try:
         # 获取 Webhook 配置
         enabled_config = Config.get_or_none(Config.key == 'webhook_enabled')
@@ -772,31 +1105,22 @@ def test_webhook():
             'message': f'测试失败: {str(e)}'
         }), 500
 
-    finally:
-        db.close()
-
 
 @app.route('/api/system/config', methods=['GET'])
 @login_required
 def get_system_config():
     """获取系统配置"""
-    db.connect(reuse_if_open=True)
-
-    try:
-        # 获取配置
-        auto_clean_config = Config.get_or_none(Config.key == 'auto_clean_logs')
-        max_logs_config = Config.get_or_none(Config.key == 'max_logs_count')
-
-        return jsonify({
-            'success': True,
-            'data': {
-                'auto_clean_logs': auto_clean_config.value == 'true' if auto_clean_config else False,
-                'max_logs_count': int(max_logs_config.value) if max_logs_config else 500
-            }
-        })
-
-    finally:
-        db.close()
+    # 获取配置
+    auto_clean_config = Config.get_or_none(Config.key == 'auto_clean_logs')
+    max_logs_config = Config.get_or_none(Config.key == 'max_logs_count')
+
+    return jsonify({
+        'success': True,
+        'data': {
+            'auto_clean_logs': auto_clean_config.value == 'true' if auto_clean_config else False,
+            'max_logs_count': int(max_logs_config.value) if max_logs_config else 500
+        }
+    })
 
 
 def get_webhook_config_dict():
@@ -822,36 +1146,22 @@ def save_system_config():
     """保存系统配置"""
     data = request.get_json()
 
-    db.connect(reuse_if_open=True)
-
-    try:
-        from datetime import datetime
-
-        # 保存自动清理配置
-        if 'auto_clean_logs' in data:
-            Config.update(
-                value='true' if data['auto_clean_logs'] else 'false',
-                updated_at=datetime.now()
-            ).where(Config.key == 'auto_clean_logs').execute()
-
-        # 保存最大记录数配置
-        if 'max_logs_count' in data:
-            max_logs = int(data['max_logs_count'])
-            if max_logs < 100:
-                return jsonify({'success': False, 'message': '最大记录数不能小于 100'}), 400
-            
-            Config.update(
-                value=str(max_logs),
-                updated_at=datetime.now()
-            ).where(Config.key == 'max_logs_count').execute()
+    # 保存自动清理配置
+    if 'auto_clean_logs' in data:
+        set_config('auto_clean_logs', 'true' if data['auto_clean_logs'] else 'false')
 
-        return jsonify({
-            'success': True,
-            'message': '系统配置保存成功'
-        })
+    # 保存最大记录数配置
+    if 'max_logs_count' in data:
+        max_logs = int(data['max_logs_count'])
+        if max_logs < 100:
+            return jsonify({'success': False, 'message': '最大记录数不能小于 100'}), 400
+        
+        set_config('max_logs_count', str(max_logs))
 
-    finally:
-        db.close()
+    return jsonify({
+        'success': True,
+        'message': '系统配置保存成功'
+    })
 
 
 @app.route('/api/system/password', methods=['POST'])
@@ -864,32 +1174,21 @@ def change_password():
     if not data.get('old_password') or not data.get('new_password'):
         return jsonify({'success': False, 'message': '缺少必填字段'}), 400
 
-    db.connect(reuse_if_open=True)
+    # 验证旧密码
+    if not check_password(data['old_password']):
+        return jsonify({'success': False, 'message': '旧密码错误'}), 400
 
-    try:
-        from datetime import datetime
+    # 验证新密码长度
+    if len(data['new_password']) < 6:
+        return jsonify({'success': False, 'message': '新密码长度不能少于 6 位'}), 400
 
-        # 验证旧密码
-        if not check_password(data['old_password']):
-            return jsonify({'success': False, 'message': '旧密码错误'}), 400
+    # 更新密码
+    set_config('admin_password', data['new_password'])
 
-        # 验证新密码长度
-        if len(data['new_password']) < 6:
-            return jsonify({'success': False, 'message': '新密码长度不能少于 6 位'}), 400
-
-        # 更新密码
-        Config.update(
-            value=data['new_password'],
-            updated_at=datetime.now()
-        ).where(Config.key == 'admin_password').execute()
-
-        return jsonify({
-            'success': True,
-            'message': '密码修改成功，请重新登录'
-        })
-
-    finally:
-        db.close()
+    return jsonify({
+        'success': True,
+        'message': '密码修改成功，请重新登录'
+    })
 
 
 # ==================== 推送通知渠道 API ====================
@@ -900,25 +1199,19 @@ def change_password():
 @login_required
 def get_notify_config():
     """获取通知渠道配置"""
-    db.connect(reuse_if_open=True)
-
-    try:
-        result = {}
-        for key in NOTIFY_CONFIG_KEYS:
-            config = Config.get_or_none(Config.key == key)
-            if config:
-                # 布尔值转换
-                if key.endswith('_enabled'):
-                    result[key] = config.value == 'true'
-                else:
-                    result[key] = config.value
+    result = {}
+    for key in NOTIFY_CONFIG_KEYS:
+        config = Config.get_or_none(Config.key == key)
+        if config:
+            # 布尔值转换
+            if key.endswith('_enabled'):
+                result[key] = config.value == 'true'
             else:
-                result[key] = False if key.endswith('_enabled') else ''
+                result[key] = config.value
+        else:
+            result[key] = False if key.endswith('_enabled') else ''
 
-        return jsonify({'success': True, 'data': result})
-
-    finally:
-        db.close()
+    return jsonify({'success': True, 'data': result})
 
 
 @app.route('/api/notify/config', methods=['POST'])
@@ -930,43 +1223,41 @@ def save_notify_config():
     if not data:
         return jsonify({'success': False, 'message': '未收到数据'}), 400
 
-    db.connect(reuse_if_open=True)
-
     try:
         saved_count = 0
-        for key in NOTIFY_CONFIG_KEYS:
-            if key in data:
-                value = data[key]
-                # 布尔值转字符串
-                if isinstance(value, bool):
-                    value = 'true' if value else 'false'
-                else:
-                    value = str(value) if value is not None else ''
-
-                # 检查配置是否存在
-                config = Config.get_or_none(Config.key == key)
-                if config:
-                    # 更新现有配置
-                    Config.update(
-                        value=value,
-                        updated_at=datetime.now()
-                    ).where(Config.key == key).execute()
-                else:
-                    # 创建新配置
-                    Config.create(
-                        key=key,
-                        value=value,
-                        updated_at=datetime.now()
-                    )
-                saved_count += 1
+        with db.atomic():
+            for key in NOTIFY_CONFIG_KEYS:
+                if key in data:
+                    value = data[key]
+                    # 布尔值转字符串
+                    if isinstance(value, bool):
+                        value = 'true' if value else 'false'
+                    else:
+                        value = str(value) if value is not None else ''
+
+                    # 保存或创建配置（事务提交后配置缓存立即失效）
+                    set_config(key, value, invalidate=False)
+                    saved_count += 1
+        invalidate_config_cache()
 
         return jsonify({'success': True, 'message': f'通知渠道配置保存成功，共 {saved_count} 项'})
 
     except Exception as e:
         return jsonify({'success': False, 'message': f'保存失败: {str(e)}'}), 500
 
-    finally:
-        db.close()
+
+@app.route('/api/notify/deliveries', methods=['GET'])
+@login_required
+def get_notify_deliveries():
+    """获取最近的通知投递结果"""
+    limit = request.args.get('limit', 50, type=int)
+
+    return jsonify({
+        'success': True,
+        'data': notify_dispatcher.recent_deliveries(max(1, min(limit, 200))),
+        'pending': notify_dispatcher.pending(),
+        'retrying': pending_retries()
+    })
 
 
 def _get_notify_config(prefix: str) -> dict:
@@ -987,8 +1278,6 @@ def _get_notify_config(prefix: str) -> dict:
 @login_required
 def test_telegram():
     """测试 Telegram 通知"""
-    db.connect(reuse_if_open=True)
-
     try:
         cfg = _get_notify_config('telegram')
 
@@ -1012,16 +1301,11 @@ def test_telegram():
     except Exception as e:
         return jsonify({'success': False, 'message': f'发送失败: {str(e)}'}), 500
 
-    finally:
-        db.close()
-
 
 @app.route('/api/notify/test/wecom', methods=['POST'])
 @login_required
 def test_wecom():
     """测试企业微信通知"""
-    db.connect(reuse_if_open=True)
-
     try:
         cfg = _get_notify_config('wecom')
 
@@ -1044,16 +1328,11 @@ def test_wecom():
     except Exception as e:
         return jsonify({'success': False, 'message': f'发送失败: {str(e)}'}), 500
 
-    finally:
-        db.close()
-
 
 @app.route('/api/notify/test/dingtalk', methods=['POST'])
 @login_required
 def test_dingtalk():
     """测试钉钉通知"""
-    db.connect(reuse_if_open=True)
-
     try:
         cfg = _get_notify_config('dingtalk')
 
@@ -1077,16 +1356,11 @@ def test_dingtalk():
     except Exception as e:
         return jsonify({'success': False, 'message': f'发送失败: {str(e)}'}), 500
 
-    finally:
-        db.close()
-
 
 @app.route('/api/notify/test/feishu', methods=['POST'])
 @login_required
 def test_feishu():
     """测试飞书通知"""
-    db.connect(reuse_if_open=True)
-
     try:
         cfg = _get_notify_config('feishu')
 
@@ -1109,13 +1383,16 @@ def test_feishu():
     except Exception as e:
         return jsonify({'success': False, 'message': f'发送失败: {str(e)}'}), 500
 
-    finally:
-        db.close()
+
+@app.before_request
+def open_db():
+    """请求开始时从连接池取出数据库连接"""
+    db.connect(reuse_if_open=True)
 
 
 @app.teardown_appcontext
 def close_db(error):
-    """请求结束时关闭数据库连接"""
+    """请求结束时将数据库连接归还连接池"""
     if not db.is_closed():
         db.close()
 
@@ -0,0 +1,168 @@
+"""Async 签到执行引擎 - 在一个共享事件循环中并发执行所有签到请求
+
+启用方式：设置环境变量 CHECKIN_ENGINE=async，并安装可选依赖 httpx。
+"""
+import asyncio
+import logging
+import threading
+from http.cookiejar import CookieJar
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+try:
+    import httpx
+except ImportError:  # 可选依赖，未安装时回退到线程引擎
+    httpx = None
+
+from .host_limiter import AsyncHostLimiter
+from .http_pool import _RejectAllCookiePolicy
+from .settings import ASYNC_CONCURRENCY, checkin_timeout_for
+
+logger = logging.getLogger(__name__)
+
+
+def _build_headers(req_params: Dict[str, Any]) -> Dict[str, str]:
+    """合并请求头与 Cookies（与 requests 行为一致：已有 Cookie 头时不覆盖）"""
+    headers = dict(req_params.get('headers') or {})
+    cookies = req_params.get('cookies') or {}
+
+    if cookies and not any(key.lower() == 'cookie' for key in headers):
+        headers['Cookie'] = '; '.join(f'{k}={v}' for k, v in cookies.items())
+
+    return headers
+
+
+class AsyncCheckinEngine:
+    """
+    Async 签到执行引擎
+
+    事件循环运行在独立的守护线程中，调度器线程通过 submit 提交签到后立即返回。
+    HTTP 请求在事件循环中并发执行（受 concurrency 限制），
+    数据库读写和通知等阻塞操作交给一个小线程池完成，不阻塞事件循环。
+    """
+
+    def __init__(self, prepare: Callable[..., Dict[str, Any]], complete: Callable[..., Dict[str, Any]],
+                 fail: Callable[..., Dict[str, Any]],
+                 concurrency: int = ASYNC_CONCURRENCY):
+        """
+        Args:
+            prepare: 签到准备函数（读取账号、解析 curl），见 scheduler.prepare_checkin
+            complete: 结果处理函数（记录日志、重试、通知），见 scheduler.complete_checkin
+            fail: 非网络异常的处理函数（记录未知错误并通知），见 scheduler.fail_checkin
+            concurrency: 同时进行的最大请求数
+        """
+        self._prepare = prepare
+        self._complete = complete
+        self._fail = fail
+        self._concurrency = concurrency
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._client = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._host_limiter = AsyncHostLimiter()
+        self._blocking_pool = ThreadPoolExecutor(max_workers=min(32, concurrency),
+                                                 thread_name_prefix='checkin-io')
+
+    @staticmethod
+    def is_available() -> bool:
+        """是否已安装 httpx"""
+        return httpx is not None
+
+    def start(self):
+        """启动事件循环线程"""
+        if self._thread is not None:
+            return
+
+        self._loop = asyncio.new_event_loop()
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, args=(ready,),
+                                        name='checkin-async', daemon=True)
+        self._thread.start()
+        ready.wait()
+        logger.info(f'Async 签到引擎已启动，最大并发 {self._concurrency}')
+
+    def _run_loop(self, ready: threading.Event):
+        asyncio.set_event_loop(self._loop)
+        self._semaphore = asyncio.Semaphore(self._concurrency)
+        self._client = httpx.AsyncClient(
+            # 客户端由所有账号共用：不保存响应中的 Cookie，每个账号的 Cookie 只随本次请求发送（与 SessionPool 一致）
+            cookies=CookieJar(policy=_RejectAllCookiePolicy()),
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self._concurrency)
+        )
+        ready.set()
+        self._loop.run_forever()
+
+    def stop(self):
+        """关闭 HTTP 客户端并停止事件循环"""
+        if self._thread is None:
+            return
+
+        try:
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result(timeout=5)
+        except Exception as e:
+            logger.warning(f'关闭 Async 客户端失败: {e}')
+
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._blocking_pool.shutdown(wait=False)
+        self._thread = None
+
+    def submit(self, account_id: int, retry_attempt: int = 0, skip_enabled_check: bool = False) -> Future:
+        """
+        提交一次签到（线程安全，立即返回）
+
+        Returns:
+            concurrent.futures.Future，结果为执行结果字典
+        """
+        if self._thread is None:
+            self.start()
+
+        return asyncio.run_coroutine_threadsafe(
+            self._checkin(account_id, retry_attempt, skip_enabled_check), self._loop
+        )
+
+    async def _run_blocking(self, func: Callable, *args, **kwargs):
+        """在线程池中执行阻塞函数"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._blocking_pool, lambda: func(*args, **kwargs))
+
+    async def _checkin(self, account_id: int, retry_attempt: int, skip_enabled_check: bool) -> Dict[str, Any]:
+        try:
+            prepared = await self._run_blocking(self._prepare, account_id, skip_enabled_check)
+            if 'status' in prepared:
+                return prepared
+
+            req_params = prepared['req_params']
+            host = urlsplit(req_params['url']).hostname
+
+            # 先按主机排队（HOST_LIMITS），再占用全局并发，避免被限流的主机占满全局并发
+            async with self._host_limiter.limit(host), self._semaphore:
+                try:
+                    response = await self._client.request(
+                        method=req_params['method'],
+                        url=req_params['url'],
+                        headers=_build_headers(req_params),
+                        content=req_params['data'],
+                        timeout=checkin_timeout_for(host)
+                    )
+                except httpx.HTTPError as e:
+                    error = str(e) or e.__class__.__name__
+                    logger.error(f'请求异常: account_id={account_id} - {error}')
+                    return await self._run_blocking(
+                        self._complete, account_id, req_params, retry_attempt, skip_enabled_check,
+                        error=error
+                    )
+                except Exception as e:  # 如请求头包含无法编码的字符
+                    return await self._run_blocking(self._fail, account_id, req_params, e)
+
+            return await self._run_blocking(
+                self._complete, account_id, req_params, retry_attempt, skip_enabled_check,
+                response_code=response.status_code,
+                response_text=response.text
+            )
+
+        except Exception as e:
+            logger.error(f'Async 签到执行失败: account_id={account_id} - {e}')
+            return {'status': 'failed', 'error': str(e)}
@@ -1,7 +1,7 @@
 """认证模块"""
 from functools import wraps
 from flask import session, redirect, url_for, request
-from .models import Config, db
+from .models import get_config
 
 
 def login_required(f):
@@ -15,13 +15,8 @@ def login_required(f):
 
 
 def get_admin_password() -> str:
-    """从数据库获取管理员密码"""
-    db.connect(reuse_if_open=True)
-    try:
-        config = Config.get_or_none(Config.key == 'admin_password')
-        return config.value if config else 'acgo123321'
-    finally:
-        db.close()
+    """从数据库获取管理员密码（不经配置缓存，修改后在所有进程中立即生效）"""
+    return get_config('admin_password', 'acgo123321', cached=False)
 
 
 def check_password(password: str) -> bool:
@@ -0,0 +1,217 @@
+"""按目标主机限制签到请求的并发数和发起间隔
+
+配置见 settings.HOST_LIMITS，格式 "主机=最大并发/最小间隔秒数"，"*" 为其他主机的默认值，
+如 "*=4/0.5,bbs.example.com=1/2"。未配置的主机不限制。
+每个主机单独计数，同一主机的请求按到达顺序排队，排队时不占用调度器工作线程。
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from .settings import HOST_LIMITS, SCHEDULER_POOL_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+def limits_for(host: Optional[str]) -> Tuple[int, float]:
+    """获取主机的 (最大并发, 最小间隔秒数)，0 表示不限制"""
+    host = (host or '').lower()
+    return HOST_LIMITS.get(host) or HOST_LIMITS.get('*') or (0, 0)
+
+
+class _HostSlot:
+    """单个主机的排队状态（由 HostLimiter._lock 保护）"""
+
+    def __init__(self, host: str, concurrency: int, interval: float):
+        self.host = host
+        self.concurrency = concurrency
+        self.interval = interval
+        self.active = 0
+        self.next_start = 0.0
+        self.waiters: Deque[Callable[[], None]] = deque()
+        self.timer: Optional[threading.Timer] = None
+
+
+class HostLimiter:
+    """
+    线程版主机限流器（thread 引擎、手动签到和 process 引擎使用）
+
+    不阻塞调用线程：没有许可时把请求放入该主机的队列后立即返回，
+    有请求结束（release）或最小间隔到期时按先来先得发放许可并启动下一个请求。
+    调度器工作线程因此不会因为某个主机排队而被占满。
+    """
+
+    def __init__(self, workers: int = SCHEDULER_POOL_SIZE):
+        """
+        Args:
+            workers: 执行受限主机请求的线程数
+        """
+        self._lock = threading.Lock()
+        self._slots: Dict[str, _HostSlot] = {}
+        self._workers = workers
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def _slot(self, host: str) -> Optional[_HostSlot]:
+        """获取主机的排队状态（调用方需持有锁），不限制的主机返回 None"""
+        concurrency, interval = limits_for(host)
+        if not concurrency and not interval:
+            return None
+
+        slot = self._slots.get(host)
+        if slot is None:
+            slot = self._slots[host] = _HostSlot(host, concurrency, interval)
+        return slot
+
+    def _take_ready(self, slot: _HostSlot) -> List[Callable[[], None]]:
+        """按顺序取出可以开始的请求（调用方需持有锁），需要等待间隔时安排定时器"""
+        ready = []
+        while slot.waiters and (not slot.concurrency or slot.active < slot.concurrency):
+            wait = slot.next_start - time.monotonic()
+            if wait > 0:
+                if slot.timer is None:
+                    slot.timer = threading.Timer(wait, self._on_timer, args=(slot,))
+                    slot.timer.daemon = True
+                    slot.timer.start()
+                break
+
+            slot.active += 1
+            slot.next_start = time.monotonic() + slot.interval
+            ready.append(slot.waiters.popleft())
+        return ready
+
+    def _start(self, host: str, starters: List[Callable[[], None]]):
+        """在锁外启动请求，启动失败时归还许可"""
+        for start in starters:
+            try:
+                start()
+            except Exception as e:
+                logger.error(f'启动受限主机请求失败: {host} - {e}')
+                self.release(host)
+
+    def _on_timer(self, slot: _HostSlot):
+        with self._lock:
+            slot.timer = None
+            ready = self._take_ready(slot)
+        self._start(slot.host, ready)
+
+    def run(self, host: Optional[str], start: Callable[[], None]):
+        """
+        获得该主机的许可后调用 start()（不限制的主机立即在当前线程调用）
+
+        start 应当只发起请求后立即返回，请求结束后必须调用 release(host)。
+        可能在当前线程、其他请求结束的线程或定时器线程中被调用。
+        """
+        host = (host or '').lower()
+        with self._lock:
+            slot = self._slot(host)
+            if slot is None:
+                ready = [start]
+            else:
+                slot.waiters.append(start)
+                ready = self._take_ready(slot)
+        self._start(host, ready)
+
+    def release(self, host: Optional[str]):
+        """归还许可，并启动排在后面的请求"""
+        host = (host or '').lower()
+        with self._lock:
+            slot = self._slot(host)
+            if slot is None:
+                return
+            slot.active -= 1
+            ready = self._take_ready(slot)
+        self._start(host, ready)
+
+    def is_limited(self, host: Optional[str]) -> bool:
+        """该主机是否配置了限制"""
+        concurrency, interval = limits_for(host)
+        return bool(concurrency or interval)
+
+    def submit(self, host: Optional[str], func: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        按主机限制执行 func（立即返回）
+
+        不限制的主机在当前线程中直接执行；受限主机在限流器自己的线程池中执行，执行完归还许可。
+
+        Returns:
+            concurrent.futures.Future，结果为 func 的返回值
+        """
+        future = Future()
+
+        if not self.is_limited(host):
+            try:
+                future.set_result(func(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        def work():
+            try:
+                future.set_result(func(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                self.release(host)
+
+        def start():
+            try:
+                self._get_pool().submit(work)
+            except Exception as e:
+                # 未能提交到线程池时 work 不会执行，由这里结束 future（许可由 _start 归还）
+                future.set_exception(e)
+                raise
+
+        self.run(host, start)
+        return future
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix='checkin-host')
+            return self._pool
+
+
+class AsyncHostLimiter:
+    """协程版主机限流器（async 引擎使用，只能在同一个事件循环中使用）"""
+
+    def __init__(self):
+        # 主机 -> (并发信号量, 间隔锁, [下一次可发起时间])
+        self._slots: Dict[str, tuple] = {}
+
+    @asynccontextmanager
+    async def limit(self, host: Optional[str]):
+        """在许可范围内执行请求"""
+        host = (host or '').lower()
+        concurrency, interval = limits_for(host)
+        if not concurrency and not interval:
+            yield
+            return
+
+        slot = self._slots.get(host)
+        if slot is None:
+            slot = self._slots[host] = (asyncio.Semaphore(concurrency) if concurrency else None,
+                                        asyncio.Lock(), [0.0])
+        semaphore, spacing_lock, next_start = slot
+
+        if semaphore is not None:
+            await semaphore.acquire()
+        try:
+            async with spacing_lock:
+                loop = asyncio.get_running_loop()
+                wait = next_start[0] - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                next_start[0] = loop.time() + interval
+            yield
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+
+
+# 全局主机限流器（线程版）
+host_limiter = HostLimiter()
@@ -0,0 +1,110 @@
+"""HTTP 会话池 - 按目标主机复用 keep-alive 连接"""
+import logging
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .settings import HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_POOL_IDLE_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+
+class _RejectAllCookiePolicy(DefaultCookiePolicy):
+    """拒绝写入会话级 Cookie，保证不同账号之间的 Cookie 互不影响"""
+
+    def set_ok(self, cookie, request):
+        return False
+
+    def return_ok(self, cookie, request):
+        return False
+
+
+class SessionPool:
+    """
+    按 (scheme, host) 管理的 requests.Session 池
+
+    - 同一主机的请求（包括不同账号和重试）复用同一个连接池，避免重复 TCP/TLS 握手
+    - 会话本身不保存 Cookie，每个账号的 Cookie 只随本次请求发送
+    - 空闲超过 idle_timeout 秒的会话会被关闭回收
+    """
+
+    def __init__(self, pool_connections: int = HTTP_POOL_CONNECTIONS, pool_maxsize: int = HTTP_POOL_MAXSIZE,
+                 idle_timeout: float = HTTP_POOL_IDLE_TIMEOUT):
+        """
+        Args:
+            pool_connections: 每个会话缓存的连接池数量（重定向到其他主机时使用）
+            pool_maxsize: 每个主机保持的最大连接数
+            idle_timeout: 会话空闲回收时间（秒）
+        """
+        self._pool_connections = pool_connections
+        self._pool_maxsize = pool_maxsize
+        self._idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        # key -> [session, 最后使用时间, 正在进行的请求数]
+        self._sessions: Dict[Tuple[str, str], list] = {}
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        session.cookies.set_policy(_RejectAllCookiePolicy())
+
+        adapter = HTTPAdapter(pool_connections=self._pool_connections, pool_maxsize=self._pool_maxsize)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def _evict_idle(self, now: float):
+        """关闭空闲超时的会话（调用方需持有锁）"""
+        expired = [key for key, (_, last_used, in_use) in self._sessions.items()
+                   if in_use == 0 and now - last_used > self._idle_timeout]
+
+        for key in expired:
+            session = self._sessions.pop(key)[0]
+            session.close()
+            logger.debug(f'回收空闲 HTTP 会话: {key[0]}://{key[1]}')
+
+    def _acquire(self, url: str) -> Tuple[Tuple[str, str], requests.Session]:
+        parts = urlsplit(url)
+        key = (parts.scheme.lower(), parts.netloc.lower())
+        now = time.monotonic()
+
+        with self._lock:
+            self._evict_idle(now)
+
+            entry = self._sessions.get(key)
+            if entry is None:
+                entry = self._sessions[key] = [self._create_session(), now, 0]
+
+            entry[1] = now
+            entry[2] += 1
+            return key, entry[0]
+
+    def _release(self, key: Tuple[str, str]):
+        with self._lock:
+            entry = self._sessions.get(key)
+            if entry:
+                entry[1] = time.monotonic()
+                entry[2] -= 1
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """使用目标主机对应的会话发送请求，参数同 requests.request"""
+        key, session = self._acquire(url)
+        try:
+            return session.request(method=method, url=url, **kwargs)
+        finally:
+            self._release(key)
+
+    def close_all(self):
+        """关闭所有会话"""
+        with self._lock:
+            for session, _, _ in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+# 全局会话池
+session_pool = SessionPool()
@@ -0,0 +1,142 @@
+"""调度租约 - 多进程/多实例部署时保证只有一个进程执行定时签到
+
+租约保存在数据库中（scheduler_leases 表），通过一条条件 UPDATE 原子地获取：
+只有租约已过期或本来就由自己持有时才能写入。持有者在后台线程中定期续约，
+进程退出时主动释放，异常退出时租约过期后由其他进程接管。
+"""
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from .models import SchedulerLease, db_connection
+from .settings import SCHEDULER_LEASE_TTL
+
+logger = logging.getLogger(__name__)
+
+# 未被持有的租约使用的过期时间
+_EXPIRED = datetime(1970, 1, 1)
+
+
+class LeaderLease:
+    """
+    基于数据库的租约锁
+
+    获得租约时调用 on_elected，失去租约（续约失败超过有效期或被其他进程接管）时调用 on_demoted。
+    """
+
+    def __init__(self, name: str, ttl: int = SCHEDULER_LEASE_TTL,
+                 on_elected: Optional[Callable[[], None]] = None,
+                 on_demoted: Optional[Callable[[], None]] = None):
+        """
+        Args:
+            name: 租约名称
+            ttl: 租约有效期（秒）
+            on_elected: 获得租约时的回调
+            on_demoted: 失去租约时的回调
+        """
+        self.name = name
+        self.ttl = ttl
+        self.owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        self._on_elected = on_elected
+        self._on_demoted = on_demoted
+        self._held = False
+        self._last_renewed: Optional[datetime] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def held(self) -> bool:
+        """当前进程是否持有租约"""
+        return self._held
+
+    def _try_acquire(self) -> bool:
+        """获取或续约（原子操作），返回是否持有租约"""
+        now = datetime.now()
+
+        with db_connection():
+            SchedulerLease.insert(
+                name=self.name, owner='', expires_at=_EXPIRED
+            ).on_conflict_ignore().execute()
+
+            updated = (SchedulerLease
+                       .update(owner=self.owner,
+                               expires_at=now + timedelta(seconds=self.ttl),
+                               renewed_at=now)
+                       .where((SchedulerLease.name == self.name)
+                              & ((SchedulerLease.owner == self.owner) | (SchedulerLease.expires_at < now)))
+                       .execute())
+
+        return updated == 1
+
+    def check(self):
+        """获取/续约一次，并在持有状态变化时调用回调"""
+        with self._lock:
+            try:
+                held = self._try_acquire()
+                if held:
+                    self._last_renewed = datetime.now()
+            except Exception as e:
+                logger.warning(f'调度租约续约失败: {e}')
+                # 数据库暂时不可用：在租约有效期内保持现状，超过有效期视为失去租约
+                held = (self._held and self._last_renewed is not None
+                        and datetime.now() - self._last_renewed < timedelta(seconds=self.ttl))
+
+            if held == self._held:
+                return
+
+            self._held = held
+            if held:
+                logger.info(f'获得调度租约: {self.owner}')
+                callback = self._on_elected
+            else:
+                logger.warning(f'失去调度租约: {self.owner}')
+                callback = self._on_demoted
+
+        if callback:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f'调度租约回调失败: {e}')
+
+    def start(self):
+        """立即尝试获取一次租约，然后在后台线程中定期续约/竞争"""
+        if self._thread is not None:
+            return
+
+        self.check()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='scheduler-lease', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.ttl / 3):
+            self.check()
+
+    def stop(self):
+        """停止续约并释放租约，让其他进程可以立即接管"""
+        if self._thread is None:
+            return
+
+        self._stop.set()
+        self._thread.join(timeout=5)
+        self._thread = None
+
+        with self._lock:
+            if not self._held:
+                return
+            self._held = False
+
+        try:
+            with db_connection():
+                (SchedulerLease
+                 .update(expires_at=_EXPIRED)
+                 .where((SchedulerLease.name == self.name) & (SchedulerLease.owner == self.owner))
+                 .execute())
+            logger.info(f'已释放调度租约: {self.owner}')
+        except Exception as e:
+            logger.warning(f'释放调度租约失败: {e}')
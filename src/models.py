@@ -1,8 +1,17 @@
 """数据库模型定义"""
 import os
+import json
+import zlib
+import hashlib
+import logging
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
+from typing import Dict, Optional
 from peewee import (
-    SqliteDatabase,
+    fn,
+    Select,
     Model,
     AutoField,
     CharField,
@@ -12,13 +21,130 @@ from peewee import (
     DateTimeField,
     ForeignKeyField,
 )
+from playhouse.pool import PooledSqliteDatabase
+
+try:
+    import zstandard
+except ImportError:  # 可选依赖，未安装时使用 zlib
+    zstandard = None
+
+from .settings import (
+    SQLITE_JOURNAL_MODE,
+    SQLITE_SYNCHRONOUS,
+    SQLITE_BUSY_TIMEOUT,
+    SQLITE_CACHE_SIZE,
+    SQLITE_MMAP_SIZE,
+    DB_MAX_CONNECTIONS,
+    DB_STALE_TIMEOUT,
+    DB_POOL_TIMEOUT,
+    CONFIG_CACHE_TTL,
+    STATS_CACHE_TTL,
+    LOG_COMPRESSION,
+    LOG_COMPRESSION_MIN_SIZE,
+)
+
+logger = logging.getLogger(__name__)
 
 # 确保数据目录存在（指向项目根目录的 data/）
 DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
 os.makedirs(DATA_DIR, exist_ok=True)
 
-# 数据库实例
-db = SqliteDatabase(os.path.join(DATA_DIR, 'acgo.db'))
+# 数据库实例（线程安全的连接池，每个新连接都会应用以下 PRAGMA）
+# 连接按线程取用：db.connect() 从池中取出，db.close() 归还池中而不是真正关闭
+db = PooledSqliteDatabase(
+    os.path.join(DATA_DIR, 'acgo.db'),
+    max_connections=DB_MAX_CONNECTIONS,
+    stale_timeout=DB_STALE_TIMEOUT,
+    timeout=DB_POOL_TIMEOUT,
+    check_same_thread=False,  # 池中的连接会被不同线程轮流使用
+    pragmas={
+        'journal_mode': SQLITE_JOURNAL_MODE,
+        'synchronous': SQLITE_SYNCHRONOUS,
+        'busy_timeout': SQLITE_BUSY_TIMEOUT,
+        'cache_size': SQLITE_CACHE_SIZE,
+        'mmap_size': SQLITE_MMAP_SIZE
+    }
+)
+
+
+@contextmanager
+def db_connection():
+    """
+    在当前线程上使用一个池化连接（可嵌套，也可作为装饰器 @db_connection()）
+
+    只有实际取出连接的最外层负责归还，内层调用不会关闭外层正在使用的连接
+    （例如 Web 请求中手动签到时，签到函数不会关闭请求的连接）。
+    """
+    opened = db.is_closed()
+    if opened:
+        db.connect()
+
+    try:
+        yield db
+    finally:
+        if opened and not db.is_closed():
+            db.close()
+
+# 配置缓存（key -> value）
+_config_cache: Optional[Dict[str, str]] = None
+_config_cache_loaded_at = 0.0
+_config_cache_generation = 0
+_config_cache_lock = threading.Lock()
+
+# 统计数据缓存
+_stats_cache: Optional[Dict[str, int]] = None
+_stats_cache_loaded_at = 0.0
+_stats_cache_generation = 0
+_stats_cache_lock = threading.Lock()
+
+
+# 压缩内容的格式前缀（以 \0 开头，不会与正常文本冲突）
+ZLIB_MAGIC = b'\x00acz'
+ZSTD_MAGIC = b'\x00acs'
+
+# 实际使用的压缩方式（未安装 zstandard 时 zstd 回退为 zlib）
+if LOG_COMPRESSION == 'zstd' and zstandard is None:
+    logger.warning('未安装 zstandard，改用 zlib 压缩')
+    LOG_COMPRESSION = 'zlib'
+
+
+class CompressedTextField(TextField):
+    """
+    透明压缩的文本字段
+
+    写入时按 LOG_COMPRESSION 压缩为带格式前缀的 BLOB（过短的内容仍保存为文本），
+    读取时按前缀自动解压；未压缩的旧记录（TEXT）原样返回。列类型仍为 TEXT，无需修改表结构。
+    """
+
+    def __init__(self, *args, compression: str = LOG_COMPRESSION, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.compression = compression
+
+    def db_value(self, value):
+        if value is None or self.compression not in ('zlib', 'zstd'):
+            return super().db_value(value)
+
+        raw = super().db_value(value).encode('utf-8')
+        if len(raw) < LOG_COMPRESSION_MIN_SIZE:
+            return raw.decode('utf-8')
+
+        if self.compression == 'zstd':
+            return ZSTD_MAGIC + zstandard.ZstdCompressor().compress(raw)
+        return ZLIB_MAGIC + zlib.compress(raw)
+
+    def python_value(self, value):
+        if isinstance(value, memoryview):
+            value = value.tobytes()
+        if not isinstance(value, bytes):
+            return value
+
+        if value.startswith(ZLIB_MAGIC):
+            value = zlib.decompress(value[len(ZLIB_MAGIC):])
+        elif value.startswith(ZSTD_MAGIC):
+            if zstandard is None:
+                return '[zstd 压缩内容，需要安装 zstandard 才能查看]'
+            value = zstandard.ZstdDecompressor().decompress(value[len(ZSTD_MAGIC):])
+        return value.decode('utf-8', errors='replace')
 
 
 class BaseModel(Model):
@@ -36,30 +162,64 @@ class Account(BaseModel):
     retry_count = IntegerField(default=3, verbose_name='重试次数')
     retry_interval = IntegerField(default=60, verbose_name='重试间隔(秒)')
     enabled = BooleanField(default=True, verbose_name='是否启用')
+    # 定时任务执行策略（见 scheduler.job_options）
+    misfire_grace_time = IntegerField(null=True, verbose_name='错过执行宽限(秒)')  # 空为全局默认，0 不限制
+    coalesce = BooleanField(default=True, verbose_name='合并错过的执行')
+    max_instances = IntegerField(default=1, verbose_name='最大并发实例数')
     created_at = DateTimeField(default=datetime.now, verbose_name='创建时间')
+    # 修改时间（定时任务同步时用于判断账号是否变化）
+    updated_at = DateTimeField(default=datetime.now, verbose_name='更新时间')
+
+    def save(self, *args, **kwargs):
+        self.updated_at = datetime.now()
+        return super().save(*args, **kwargs)
 
     class Meta:
         table_name = 'accounts'
 
 
+class RequestSnapshot(BaseModel):
+    """请求快照表（按内容哈希去重，同一账号 curl 不变时所有签到记录共用一条）"""
+    id = AutoField(primary_key=True)
+    content_hash = CharField(max_length=64, unique=True, verbose_name='内容哈希')
+    method = CharField(max_length=10, null=True, verbose_name='请求方式')
+    url = TextField(null=True, verbose_name='请求地址')
+    headers = TextField(null=True, verbose_name='请求头')
+    cookies = TextField(null=True, verbose_name='请求Cookies')
+    data = CompressedTextField(null=True, verbose_name='请求体')
+    created_at = DateTimeField(default=datetime.now, verbose_name='创建时间')
+
+    class Meta:
+        table_name = 'request_snapshots'
+
+
 class CheckinLog(BaseModel):
     """签到日志表"""
     id = AutoField(primary_key=True)
-    account = ForeignKeyField(Account, backref='logs', on_delete='CASCADE')
+    # 外键不单独建索引，由 (account, executed_at) 联合索引覆盖
+    account = ForeignKeyField(Account, backref='logs', on_delete='CASCADE', index=False)
     status = CharField(max_length=20, verbose_name='状态')  # success, failed
     response_code = IntegerField(null=True, verbose_name='响应状态码')
-    response_body = TextField(null=True, verbose_name='响应内容')
+    response_body = CompressedTextField(null=True, verbose_name='响应内容')
     error_message = TextField(null=True, verbose_name='错误信息')
-    executed_at = DateTimeField(default=datetime.now, verbose_name='执行时间')
-    # 请求参数字段（用于记录实际发送的请求）
+    executed_at = DateTimeField(default=datetime.now, index=True, verbose_name='执行时间')
+    # 实际发送的请求（指向去重后的请求快照）
+    request_snapshot = ForeignKeyField(RequestSnapshot, null=True, on_delete='SET NULL', verbose_name='请求快照')
+    # 旧版请求参数字段（迁移后为空，仅兼容未迁移的旧记录）
     request_method = CharField(max_length=10, null=True, verbose_name='请求方式')
     request_url = TextField(null=True, verbose_name='请求地址')
     request_headers = TextField(null=True, verbose_name='请求头')
     request_cookies = TextField(null=True, verbose_name='请求Cookies')
-    request_data = TextField(null=True, verbose_name='请求体')
+    request_data = CompressedTextField(null=True, verbose_name='请求体')
 
     class Meta:
         table_name = 'checkin_logs'
+        indexes = (
+            # 按状态筛选并按时间倒序分页、按状态计数
+            (('status', 'executed_at'), False),
+            # 按账号查询最近记录、删除账号时的级联删除
+            (('account', 'executed_at'), False),
+        )
 
 
 class Config(BaseModel):
@@ -73,6 +233,180 @@ class Config(BaseModel):
         table_name = 'configs'
 
 
+class NotifyOutbox(BaseModel):
+    """通知重试队列（发送失败或被限流的通知，按渠道逐条重试）"""
+    id = AutoField(primary_key=True)
+    channel = CharField(max_length=20, verbose_name='通知渠道')
+    payload = TextField(verbose_name='通知内容(JSON)')
+    attempts = IntegerField(default=0, verbose_name='已重试次数')
+    next_attempt_at = DateTimeField(default=datetime.now, index=True, verbose_name='下次重试时间')
+    created_at = DateTimeField(default=datetime.now, verbose_name='创建时间')
+
+    class Meta:
+        table_name = 'notify_outbox'
+
+
+class SchedulerLease(BaseModel):
+    """调度租约表（多进程部署时只有持有租约的进程执行定时任务）"""
+    id = AutoField(primary_key=True)
+    name = CharField(max_length=50, unique=True, verbose_name='租约名称')
+    owner = CharField(max_length=100, verbose_name='持有者')
+    expires_at = DateTimeField(verbose_name='过期时间')
+    renewed_at = DateTimeField(default=datetime.now, verbose_name='最后续约时间')
+
+    class Meta:
+        table_name = 'scheduler_leases'
+
+
+def save_request_snapshot(method: Optional[str], url: Optional[str], headers: Optional[str],
+                          cookies: Optional[str], data: Optional[str]) -> int:
+    """
+    保存请求快照（内容相同的快照只保存一份）
+
+    调用方应在同一事务中写入引用该快照的签到记录，否则可能在两次写入之间被 purge_orphan_snapshots 删除。
+
+    Args:
+        headers/cookies: JSON 字符串
+
+    Returns:
+        快照 ID
+    """
+    content = json.dumps([method, url, headers, cookies, data], ensure_ascii=False)
+    content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+    with db_connection():
+        RequestSnapshot.insert(
+            content_hash=content_hash,
+            method=method,
+            url=url,
+            headers=headers,
+            cookies=cookies,
+            data=data
+        ).on_conflict_ignore().execute()
+
+        return (RequestSnapshot
+                .select(RequestSnapshot.id)
+                .where(RequestSnapshot.content_hash == content_hash)
+                .scalar())
+
+
+def purge_orphan_snapshots() -> int:
+    """删除不再被任何签到记录引用的请求快照，返回删除条数"""
+    with db_connection():
+        referenced = (CheckinLog
+                      .select(CheckinLog.request_snapshot)
+                      .where(CheckinLog.request_snapshot.is_null(False)))
+        return RequestSnapshot.delete().where(RequestSnapshot.id.not_in(referenced)).execute()
+
+
+def _load_config_cache() -> Dict[str, str]:
+    """返回配置缓存，过期或被失效时用一次查询重新加载全部配置"""
+    global _config_cache, _config_cache_loaded_at
+
+    with _config_cache_lock:
+        if _config_cache is not None and time.monotonic() - _config_cache_loaded_at < CONFIG_CACHE_TTL:
+            return _config_cache
+        generation = _config_cache_generation
+
+    with db_connection():
+        values = {row.key: row.value for row in Config.select(Config.key, Config.value)}
+
+    with _config_cache_lock:
+        # 加载期间发生了写入时，本次结果可能已过期，不写回缓存
+        if generation == _config_cache_generation:
+            _config_cache = values
+            _config_cache_loaded_at = time.monotonic()
+
+    return values
+
+
+def get_config(key: str, default: Optional[str] = None, cached: bool = True) -> Optional[str]:
+    """
+    读取配置值（进程内缓存）
+
+    缓存在写入（set_config）时立即失效；其他进程修改的配置最迟 CONFIG_CACHE_TTL 秒后生效。
+    不能延迟生效的配置（如管理员密码）传 cached=False 直接查询数据库。
+    """
+    if not cached:
+        with db_connection():
+            config = Config.get_or_none(Config.key == key)
+        return config.value if config else default
+    return _load_config_cache().get(key, default)
+
+
+def set_config(key: str, value: str, invalidate: bool = True):
+    """
+    写入配置值（不存在则创建），并使配置缓存失效
+
+    在事务中批量写入时传 invalidate=False，并在事务提交后调用一次 invalidate_config_cache，
+    否则其他线程可能在提交前用旧值重新加载缓存。
+    """
+    with db_connection():
+        Config.insert(
+            key=key,
+            value=value,
+            updated_at=datetime.now()
+        ).on_conflict(
+            conflict_target=[Config.key],
+            update={Config.value: value, Config.updated_at: datetime.now()}
+        ).execute()
+
+    if invalidate:
+        invalidate_config_cache()
+
+
+def invalidate_config_cache():
+    """使配置缓存失效"""
+    global _config_cache, _config_cache_generation
+
+    with _config_cache_lock:
+        _config_cache = None
+        _config_cache_generation += 1
+
+
+def get_stats() -> Dict[str, int]:
+    """
+    获取统计数据（账号数、启用账号数、日志数、成功日志数）
+
+    四个计数合并为一条查询，结果缓存 STATS_CACHE_TTL 秒；
+    用户修改账号或清除日志时调用 invalidate_stats_cache 立即失效；
+    签到日志的写入不失效缓存（定时任务集中执行时缓存仍然有效），最多延迟 STATS_CACHE_TTL 秒反映。
+    """
+    global _stats_cache, _stats_cache_loaded_at
+
+    with _stats_cache_lock:
+        if _stats_cache is not None and time.monotonic() - _stats_cache_loaded_at < STATS_CACHE_TTL:
+            return dict(_stats_cache)
+        generation = _stats_cache_generation
+
+    query = Select(columns=[
+        Account.select(fn.COUNT(Account.id)).alias('total_accounts'),
+        Account.select(fn.COUNT(Account.id)).where(Account.enabled == True).alias('enabled_accounts'),
+        CheckinLog.select(fn.COUNT(CheckinLog.id)).alias('total_logs'),
+        CheckinLog.select(fn.COUNT(CheckinLog.id)).where(CheckinLog.status == 'success').alias('success_logs'),
+    ]).bind(db)
+
+    with db_connection():
+        stats = query.dicts().get()
+
+    with _stats_cache_lock:
+        if generation == _stats_cache_generation:
+            _stats_cache = stats
+            _stats_cache_loaded_at = time.monotonic()
+
+    return dict(stats)
+
+
+def invalidate_stats_cache():
+    """使统计数据缓存失效"""
+    global _stats_cache, _stats_cache_generation
+
+    with _stats_cache_lock:
+        _stats_cache = None
+        _stats_cache_generation += 1
+
+
+@db_connection()
 def init_config():
     """初始化系统配置（从环境变量读取默认值）"""
     import os
@@ -80,35 +414,34 @@ def init_config():
     
     load_dotenv()
     
-    db.connect(reuse_if_open=True)
+    # 配置项及其默认值
+    default_configs = {
+        'admin_password': os.getenv('ADMIN_PASSWORD', 'acgo123321'),
+        'auto_clean_logs': os.getenv('AUTO_CLEAN_LOGS', 'false'),
+        'max_logs_count': os.getenv('MAX_LOGS_COUNT', '500')
+    }
     
-    try:
-        # 配置项及其默认值
-        default_configs = {
-            'admin_password': os.getenv('ADMIN_PASSWORD', 'acgo123321'),
-            'auto_clean_logs': os.getenv('AUTO_CLEAN_LOGS', 'false'),
-            'max_logs_count': os.getenv('MAX_LOGS_COUNT', '500')
-        }
-        
-        # 检查并初始化配置
-        for key, default_value in default_configs.items():
-            existing = Config.get_or_none(Config.key == key)
-            if not existing:
-                Config.create(
-                    key=key,
-                    value=default_value,
-                    updated_at=datetime.now()
-                )
-                print(f'初始化配置: {key} = {default_value}')
-    
-    finally:
-        db.close()
+    # 检查并初始化配置
+    for key, default_value in default_configs.items():
+        existing = Config.get_or_none(Config.key == key)
+        if not existing:
+            Config.create(
+                key=key,
+                value=default_value,
+                updated_at=datetime.now()
+            )
+            print(f'初始化配置: {key} = {default_value}')
 
+    invalidate_config_cache()
 
+
+@db_connection()
 def migrate_database():
-    """数据库迁移：添加缺失的字段"""
-    db.connect(reuse_if_open=True)
+    """
+    数据库迁移：为已有的表添加缺失的字段
 
+    在 create_tables 之前执行，新字段的索引由 create_tables 在字段添加后创建；表不存在时跳过（由 create_tables 新建）。
+    """
     try:
         # 检查 checkin_logs 表是否存在新字段
         cursor = db.execute_sql("PRAGMA table_info(checkin_logs)")
@@ -120,38 +453,172 @@ def migrate_database():
             'request_url': 'TEXT',
             'request_headers': 'TEXT',
             'request_cookies': 'TEXT',
-            'request_data': 'TEXT'
+            'request_data': 'TEXT',
+            'request_snapshot_id': 'INTEGER REFERENCES request_snapshots (id) ON DELETE SET NULL'
         }
 
         # 检查并添加缺失的字段
         for field_name, field_type in new_fields.items():
-            if field_name not in columns:
+            if columns and field_name not in columns:
                 print(f'添加字段: {field_name}')
                 db.execute_sql(f'ALTER TABLE checkin_logs ADD COLUMN {field_name} {field_type}')
 
+        # 账号表：修改时间（旧账号以创建时间填充）
+        cursor = db.execute_sql("PRAGMA table_info(accounts)")
+        account_columns = [row[1] for row in cursor.fetchall()]
+        if account_columns and 'updated_at' not in account_columns:
+            print('添加字段: accounts.updated_at')
+            db.execute_sql('ALTER TABLE accounts ADD COLUMN updated_at DATETIME')
+            db.execute_sql('UPDATE accounts SET updated_at = created_at WHERE updated_at IS NULL')
+
+        # 账号表：定时任务执行策略
+        account_fields = {
+            'misfire_grace_time': 'INTEGER',
+            'coalesce': 'INTEGER NOT NULL DEFAULT 1',
+            'max_instances': 'INTEGER NOT NULL DEFAULT 1'
+        }
+        for field_name, field_type in account_fields.items():
+            if account_columns and field_name not in account_columns:
+                print(f'添加字段: accounts.{field_name}')
+                db.execute_sql(f'ALTER TABLE accounts ADD COLUMN {field_name} {field_type}')
+
+        # 旧版本的外键索引已被 (account, executed_at) 联合索引覆盖，删除以减少写入开销
+        db.execute_sql('DROP INDEX IF EXISTS checkinlog_account_id')
+
         print('数据库迁移完成')
 
     except Exception as e:
         print(f'数据库迁移失败: {e}')
 
-    finally:
-        db.close()
+
+def migrate_request_snapshots(batch_size: int = 1000) -> int:
+    """
+    把旧记录中逐条保存的请求参数迁移到请求快照表，并清空旧字段
+
+    分批执行，每批一个事务；迁移后的空间可通过 VACUUM 回收。
+
+    Returns:
+        迁移的签到记录数
+    """
+    legacy = (CheckinLog.request_snapshot.is_null()
+              & (CheckinLog.request_method.is_null(False) | CheckinLog.request_url.is_null(False)))
+    migrated = 0
+
+    while True:
+        with db.atomic():
+            rows = list(CheckinLog
+                        .select(CheckinLog.id, CheckinLog.request_method, CheckinLog.request_url,
+                                CheckinLog.request_headers, CheckinLog.request_cookies, CheckinLog.request_data)
+                        .where(legacy)
+                        .limit(batch_size))
+            if not rows:
+                break
+
+            # 同一快照的记录合并为一条 UPDATE
+            groups: Dict[int, list] = {}
+            for row in rows:
+                snapshot_id = save_request_snapshot(row.request_method, row.request_url, row.request_headers,
+                                                    row.request_cookies, row.request_data)
+                groups.setdefault(snapshot_id, []).append(row.id)
+
+            for snapshot_id, log_ids in groups.items():
+                CheckinLog.update(
+                    request_snapshot=snapshot_id,
+                    request_method=None,
+                    request_url=None,
+                    request_headers=None,
+                    request_cookies=None,
+                    request_data=None
+                ).where(CheckinLog.id.in_(log_ids)).execute()
+
+        migrated += len(rows)
+
+    return migrated
+
+
+def compress_existing_logs(batch_size: int = 500) -> int:
+    """
+    按当前 LOG_COMPRESSION 设置压缩已有的未压缩记录（响应内容和请求体）
+
+    分批执行，每批一个事务；完成后可执行 VACUUM 回收空间。
+
+    Returns:
+        重写的记录数
+    """
+    if LOG_COMPRESSION not in ('zlib', 'zstd'):
+        return 0
+
+    targets = [
+        (CheckinLog, [CheckinLog.response_body, CheckinLog.request_data]),
+        (RequestSnapshot, [RequestSnapshot.data]),
+    ]
+    rewritten = 0
+
+    with db_connection():
+        for model, fields in targets:
+            # 只处理以文本保存且达到压缩阈值的内容
+            uncompressed = None
+            for field in fields:
+                condition = (fn.TYPEOF(field) == 'text') & (fn.LENGTH(field.cast('BLOB')) >= LOG_COMPRESSION_MIN_SIZE)
+                uncompressed = condition if uncompressed is None else (uncompressed | condition)
+
+            last_id = 0
+            while True:
+                with db.atomic():
+                    rows = list(model
+                                .select(model._meta.primary_key, *fields)
+                                .where(uncompressed & (model._meta.primary_key > last_id))
+                                .order_by(model._meta.primary_key)
+                                .limit(batch_size))
+                    if not rows:
+                        break
+
+                    for row in rows:
+                        # 字段写入时自动压缩
+                        model.update({field: getattr(row, field.name) for field in fields}).where(
+                            model._meta.primary_key == row.get_id()
+                        ).execute()
+
+                last_id = rows[-1].get_id()
+                rewritten += len(rows)
+
+    return rewritten
 
 
 def init_db():
     """初始化数据库"""
-    db.connect(reuse_if_open=True)
-    db.create_tables([Account, CheckinLog, Config], safe=True)  # safe=True 表示表已存在时不报错
-    db.close()
+    with db_connection():
+        # 先为已有的表补齐字段，再建表和索引（新字段上的索引要求字段已存在）
+        migrate_database()
+        db.create_tables([Account, RequestSnapshot, CheckinLog, Config, NotifyOutbox, SchedulerLease], safe=True)  # safe=True 表示表已存在时不报错
     print('数据库检查完成')
 
-    # 执行数据库迁移
-    migrate_database()
+    # 旧记录的请求参数迁移到请求快照表
+    try:
+        migrated = migrate_request_snapshots()
+        if migrated:
+            print(f'迁移请求快照: {migrated} 条签到记录')
+    except Exception as e:
+        print(f'迁移请求快照失败: {e}')
 
     # 初始化配置
     init_config()
 
 
 if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='数据库管理')
+    parser.add_argument('command', nargs='?', default='init', choices=['init', 'compress'],
+                        help='init: 初始化/迁移数据库（默认）；compress: 压缩已有签到记录并回收空间')
+    args = parser.parse_args()
+
     init_db()
+    if args.command == 'compress':
+        if LOG_COMPRESSION not in ('zlib', 'zstd'):
+            parser.error('LOG_COMPRESSION 未启用（zlib / zstd），无需压缩')
+        count = compress_existing_logs()
+        print(f'已压缩 {count} 条记录，正在回收空间...')
+        with db_connection():
+            db.execute_sql('VACUUM')
     print('数据库初始化完成')
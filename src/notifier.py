@@ -6,12 +6,26 @@ import base64
 import json
 import urllib.parse
 import logging
-from datetime import datetime
-from typing import Optional
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
 
 import requests
 
-from .models import Config
+from .models import NotifyOutbox, db_connection, get_config
+from .settings import (
+    NOTIFY_WORKERS,
+    NOTIFY_QUEUE_SIZE,
+    NOTIFY_HISTORY_SIZE,
+    NOTIFY_RATE_LIMITS,
+    NOTIFY_RATE_WAIT,
+    NOTIFY_MAX_RETRIES,
+    NOTIFY_RETRY_INTERVAL,
+    notify_timeout_for,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -21,14 +35,146 @@ NOTIFY_CONFIG_KEYS = [
     'telegram_enabled', 'telegram_bot_token', 'telegram_user_id', 'telegram_api_url',
     'wecom_enabled', 'wecom_webhook_key', 'wecom_api_url',
     'dingtalk_enabled', 'dingtalk_access_token', 'dingtalk_secret', 'dingtalk_api_url',
-    'feishu_enabled', 'feishu_webhook_url', 'feishu_secret'
+    'feishu_enabled', 'feishu_webhook_url', 'feishu_secret',
+    'digest_enabled', 'digest_window', 'digest_failures_immediate'
 ]
 
+# 汇总推送默认窗口（秒）
+DEFAULT_DIGEST_WINDOW = 60
+
+# 汇总消息中最多列出的失败账号数
+DIGEST_MAX_FAILED_LINES = 20
+
+
+# 服务端未给出等待时间时的限流退避秒数（钉钉/企业微信按分钟计数）
+DEFAULT_RATE_LIMIT_BACKOFF = 60
+
+# 钉钉 130101 / 企业微信 45009 / 飞书 9499、11232：发送过快
+_RATE_LIMIT_ERRCODES = {130101, 45009, 9499, 11232}
+
+
+class _TokenBucket:
+    """
+    令牌桶限速器
+
+    每分钟最多发放 per_minute 个令牌（桶容量为 1，即匀速发送，不会在窗口开始时突发）；
+    服务端返回限流提示时，在提示的时间内暂停发放令牌。
+    """
+
+    def __init__(self, per_minute: int):
+        self._rate = per_minute / 60.0
+        self._tokens = 1.0
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        if self._rate:
+            self._tokens = min(1.0, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def _wait_time(self, now: float) -> float:
+        wait = max(self._blocked_until - now, 0.0)
+        if self._rate and self._tokens < 1:
+            wait = max(wait, (1 - self._tokens) / self._rate)
+        return wait
+
+    def ready_in(self) -> float:
+        """距离下一个可用令牌的秒数"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            return self._wait_time(now)
+
+    def acquire(self, max_wait: float) -> bool:
+        """
+        取得一个令牌（必要时等待）
+
+        Returns:
+            需要等待的时间超过 max_wait 时不取令牌，返回 False
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = self._wait_time(now)
+            if wait > max_wait:
+                return False
+            # 预留令牌（可能为负，后续调用者顺延等待）
+            if self._rate:
+                self._tokens -= 1
+
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    def backoff(self, seconds: float):
+        """服务端要求退避：seconds 秒内不再发放令牌"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+# 各渠道限速器
+_limiters: Dict[str, _TokenBucket] = {channel: _TokenBucket(rate) for channel, rate in NOTIFY_RATE_LIMITS.items()}
+
+
+def _retry_after_seconds(response: requests.Response, body: Dict[str, Any]) -> Optional[float]:
+    """读取服务端给出的等待时间（Retry-After 头或 Telegram 的 parameters.retry_after）"""
+    parameters = body.get('parameters')
+    candidates = [
+        response.headers.get('Retry-After'),
+        parameters.get('retry_after') if isinstance(parameters, dict) else None
+    ]
+    for value in candidates:
+        try:
+            if value is not None and float(value) > 0:
+                return float(value)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def _check_response(channel: str, response: requests.Response) -> bool:
+    """判断渠道是否发送成功；遇到限流时让该渠道按服务端提示退避"""
+    try:
+        body = response.json()
+    except ValueError:
+        body = None
+    if not isinstance(body, dict):
+        body = {}
+
+    rate_limited = (response.status_code == 429
+                    or body.get('errcode') in _RATE_LIMIT_ERRCODES
+                    or body.get('code') in _RATE_LIMIT_ERRCODES)
+    if rate_limited:
+        retry_after = _retry_after_seconds(response, body) or DEFAULT_RATE_LIMIT_BACKOFF
+        _limiters[channel].backoff(retry_after)
+        logger.warning(f'{channel} 通知被限流，{retry_after:.0f} 秒后重试')
+        return False
+
+    if not 200 <= response.status_code < 300:
+        return False
+
+    # 钉钉/企业微信/飞书的业务错误在 HTTP 200 响应中以非 0 的 errcode/code 返回
+    if channel != 'webhook' and (body.get('errcode') or body.get('code')):
+        logger.error(f'{channel} 通知失败: {body}')
+        return False
+
+    return True
+
+
+def _request(channel: str, method: str, url: str, timeout: float, **kwargs) -> bool:
+    """按渠道限速发送请求；等待令牌超过 NOTIFY_RATE_WAIT 秒时放弃本次发送（由重试队列稍后发送）"""
+    if not _limiters[channel].acquire(NOTIFY_RATE_WAIT):
+        logger.info(f'{channel} 通知发送过快，转入重试队列')
+        return False
+
+    response = requests.request(method, url, timeout=timeout, **kwargs)
+    return _check_response(channel, response)
+
 
 def _get_config(key: str) -> Optional[str]:
-    """获取配置值"""
-    config = Config.get_or_none(Config.key == key)
-    return config.value if config else None
+    """获取配置值（读取进程内配置缓存）"""
+    return get_config(key)
 
 
 def _is_enabled(key: str) -> bool:
@@ -36,16 +182,19 @@ def _is_enabled(key: str) -> bool:
     return _get_config(key) == 'true'
 
 
+# 各渠道发送函数返回值：True 发送成功 / False 发送失败或被限流 / None 渠道未启用或未配置
+
+
 def _send_webhook(account_name: str, status: str, response_code: int = None,
-                  message: str = '', response_body: str = None) -> bool:
+                  message: str = '', response_body: str = None, timeout: float = 10) -> Optional[bool]:
     """发送通用 Webhook 通知"""
     try:
         if not _is_enabled('webhook_enabled'):
-            return False
+            return None
 
         url = _get_config('webhook_url')
         if not url:
-            return False
+            return None
 
         method = _get_config('webhook_method') or 'POST'
 
@@ -79,32 +228,30 @@ def _send_webhook(account_name: str, status: str, response_code: int = None,
             if 'multipart/form-data' in content_type:
                 headers.pop('Content-Type', None)
                 files = {k: (None, str(v)) for k, v in payload.items()}
-                requests.post(url, files=files, headers=headers, timeout=10)
+                return _request('webhook', 'POST', url, timeout, files=files, headers=headers)
             elif 'application/x-www-form-urlencoded' in content_type:
-                requests.post(url, data=payload, headers=headers, timeout=10)
+                return _request('webhook', 'POST', url, timeout, data=payload, headers=headers)
             else:
                 headers['Content-Type'] = 'application/json'
-                requests.post(url, json=payload, headers=headers, timeout=10)
+                return _request('webhook', 'POST', url, timeout, json=payload, headers=headers)
         else:
-            requests.get(url, params=payload, headers=headers, timeout=10)
-
-        return True
+            return _request('webhook', 'GET', url, timeout, params=payload, headers=headers)
 
     except Exception as e:
         logger.error(f'Webhook 通知异常: {e}')
         return False
 
 
-def _send_telegram(message: str) -> bool:
+def _send_telegram(message: str, timeout: float = 10) -> Optional[bool]:
     """发送 Telegram 消息"""
     try:
         if not _is_enabled('telegram_enabled'):
-            return False
+            return None
 
         bot_token = _get_config('telegram_bot_token')
         user_id = _get_config('telegram_user_id')
         if not bot_token or not user_id:
-            return False
+            return None
 
         api_url = _get_config('telegram_api_url')
         base_url = api_url.rstrip('/') if api_url else 'https://api.telegram.org'
@@ -116,23 +263,22 @@ def _send_telegram(message: str) -> bool:
             'parse_mode': 'HTML'
         }
 
-        requests.post(url, json=payload, timeout=10)
-        return True
+        return _request('telegram', 'POST', url, timeout, json=payload)
 
     except Exception as e:
         logger.error(f'Telegram 通知异常: {e}')
         return False
 
 
-def _send_dingtalk(message: str) -> bool:
+def _send_dingtalk(message: str, timeout: float = 10) -> Optional[bool]:
     """发送钉钉消息"""
     try:
         if not _is_enabled('dingtalk_enabled'):
-            return False
+            return None
 
         access_token = _get_config('dingtalk_access_token')
         if not access_token:
-            return False
+            return None
 
         api_url = _get_config('dingtalk_api_url')
         base_url = api_url.rstrip('/') if api_url else 'https://oapi.dingtalk.com'
@@ -152,23 +298,22 @@ def _send_dingtalk(message: str) -> bool:
             'text': {'content': message}
         }
 
-        requests.post(url, json=payload, timeout=10)
-        return True
+        return _request('dingtalk', 'POST', url, timeout, json=payload)
 
     except Exception as e:
         logger.error(f'钉钉通知异常: {e}')
         return False
 
 
-def _send_wecom(message: str) -> bool:
+def _send_wecom(message: str, timeout: float = 10) -> Optional[bool]:
     """发送企业微信消息"""
     try:
         if not _is_enabled('wecom_enabled'):
-            return False
+            return None
 
         webhook_key = _get_config('wecom_webhook_key')
         if not webhook_key:
-            return False
+            return None
 
         api_url = _get_config('wecom_api_url')
         base_url = api_url.rstrip('/') if api_url else 'https://qyapi.weixin.qq.com'
@@ -179,23 +324,22 @@ def _send_wecom(message: str) -> bool:
             'text': {'content': message}
         }
 
-        requests.post(url, json=payload, timeout=10)
-        return True
+        return _request('wecom', 'POST', url, timeout, json=payload)
 
     except Exception as e:
         logger.error(f'企业微信通知异常: {e}')
         return False
 
 
-def _send_feishu(message: str) -> bool:
+def _send_feishu(message: str, timeout: float = 10) -> Optional[bool]:
     """发送飞书消息"""
     try:
         if not _is_enabled('feishu_enabled'):
-            return False
+            return None
 
         webhook_url = _get_config('feishu_webhook_url')
         if not webhook_url:
-            return False
+            return None
 
         payload = {
             'msg_type': 'text',
@@ -212,18 +356,375 @@ def _send_feishu(message: str) -> bool:
             payload['timestamp'] = timestamp
             payload['sign'] = sign
 
-        requests.post(webhook_url, json=payload, timeout=10)
-        return True
+        return _request('feishu', 'POST', webhook_url, timeout, json=payload)
 
     except Exception as e:
         logger.error(f'飞书通知异常: {e}')
         return False
 
 
+# 渠道名称 -> 发送函数（IM 渠道只接收文本消息）
+_IM_CHANNELS = {
+    'telegram': _send_telegram,
+    'dingtalk': _send_dingtalk,
+    'wecom': _send_wecom,
+    'feishu': _send_feishu,
+}
+
+
+# 所有渠道（包括通用 Webhook）
+_ALL_CHANNELS = ['webhook', *_IM_CHANNELS]
+
+
+def _delivery_state(result: Optional[bool]) -> str:
+    """发送函数返回值转为投递状态"""
+    if result is None:
+        return 'skipped'
+    return 'sent' if result else 'failed'
+
+
+def _send_to_channel(channel: str, event: dict) -> Optional[bool]:
+    """发送一条通知到指定渠道"""
+    timeout = notify_timeout_for(channel)
+    if channel == 'webhook':
+        return _send_webhook(event['account_name'], event['status'], event.get('response_code'),
+                             event.get('message', ''), event.get('response_body'), timeout=timeout)
+    return _IM_CHANNELS[channel](event['text'], timeout=timeout)
+
+
+def _retry_delay(channel: str, attempts: int) -> float:
+    """下次重试的延迟：指数退避（最长 1 小时），且不早于渠道限速/退避结束"""
+    return max(min(NOTIFY_RETRY_INTERVAL * 2 ** attempts, 3600), _limiters[channel].ready_in())
+
+
+def _enqueue_retry(channels: List[str], event: dict):
+    """把发送失败的通知写入重试队列（每个渠道一条）"""
+    payload = json.dumps({k: v for k, v in event.items() if k != 'queued_at'}, ensure_ascii=False)
+    now = datetime.now()
+
+    try:
+        with db_connection():
+            NotifyOutbox.insert_many([
+                {'channel': channel, 'payload': payload,
+                 'next_attempt_at': now + timedelta(seconds=_retry_delay(channel, 0))}
+                for channel in channels
+            ]).execute()
+    except Exception as e:
+        logger.error(f"写入通知重试队列失败: {event.get('account_name')} - {e}")
+
+
+# 分发队列中的重试队列扫描请求（见 NotificationDispatcher.request_retry_sweep）
+_RETRY_SWEEP = object()
+
+
+class NotificationDispatcher:
+    """
+    后台通知分发器
+
+    签到线程只负责把通知放入有界队列，随即返回；
+    工作线程取出通知后，通过渠道线程池并行发送到各个渠道，每个渠道使用独立的超时。
+    最近的投递结果保存在内存中，供 /api/notify/deliveries 查看。
+    """
+
+    def __init__(self, workers: int = NOTIFY_WORKERS, queue_size: int = NOTIFY_QUEUE_SIZE,
+                 history_size: int = NOTIFY_HISTORY_SIZE):
+        self._workers = workers
+        self._queue: 'queue.Queue[Optional[dict]]' = queue.Queue(maxsize=queue_size)
+        self._history: deque = deque(maxlen=history_size)
+        self._history_lock = threading.Lock()
+        self._threads = []
+        self._start_lock = threading.Lock()
+        self._channel_pool = ThreadPoolExecutor(max_workers=workers * (len(_IM_CHANNELS) + 1),
+                                                thread_name_prefix='notify-channel')
+        # 汇总模式：窗口期内收集的签到结果
+        self._digest_events: List[dict] = []
+        self._digest_started_at: Optional[datetime] = None
+        self._digest_timer: Optional[threading.Timer] = None
+        self._digest_lock = threading.Lock()
+        # 是否已有重试队列扫描在排队或执行
+        self._sweep_pending = False
+        self._sweep_lock = threading.Lock()
+
+    def _ensure_started(self):
+        if self._threads:
+            return
+
+        with self._start_lock:
+            if self._threads:
+                return
+            for i in range(self._workers):
+                thread = threading.Thread(target=self._run, name=f'notify-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def submit(self, event: dict) -> bool:
+        """
+        提交一条通知（不等待发送）
+
+        Returns:
+            是否成功入队；队列已满时丢弃并返回 False
+        """
+        self._ensure_started()
+        event['queued_at'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            # 队列已满时直接写入重试队列，由后台重试任务发送（未启用的渠道会被跳过）
+            logger.warning(f"通知队列已满，转入重试队列: {event.get('account_name')}")
+            _enqueue_retry(_ALL_CHANNELS, event)
+            self._record(event, {'*': 'retrying'})
+            return False
+
+    def request_retry_sweep(self) -> bool:
+        """
+        请求一次重试队列扫描（由调度器定期调用，不等待发送）
+
+        扫描在分发器的工作线程中执行，等待渠道限速时不占用调度线程；
+        上一次扫描尚未完成或队列已满时跳过本次。
+
+        Returns:
+            是否已加入分发队列
+        """
+        self._ensure_started()
+        with self._sweep_lock:
+            if self._sweep_pending:
+                return False
+            self._sweep_pending = True
+
+        try:
+            self._queue.put_nowait(_RETRY_SWEEP)
+            return True
+        except queue.Full:
+            with self._sweep_lock:
+                self._sweep_pending = False
+            return False
+
+    def add_to_digest(self, event: dict, window: float):
+        """
+        加入汇总缓冲区
+
+        窗口内第一条结果到达时开始计时，window 秒后把期间的所有结果合并成一条汇总通知发送。
+        """
+        with self._digest_lock:
+            self._digest_events.append(event)
+            if self._digest_timer is None:
+                self._digest_started_at = datetime.now()
+                self._digest_timer = threading.Timer(window, self.flush_digest)
+                self._digest_timer.daemon = True
+                self._digest_timer.start()
+
+    def flush_digest(self):
+        """立即发送汇总通知（缓冲区为空时不发送）"""
+        with self._digest_lock:
+            events, started_at = self._digest_events, self._digest_started_at
+            if self._digest_timer is not None:
+                self._digest_timer.cancel()
+            self._digest_events, self._digest_started_at, self._digest_timer = [], None, None
+
+        if events:
+            self.submit(_build_digest_event(events, started_at))
+
+    def _run(self):
+        while True:
+            event = self._queue.get()
+            try:
+                if event is None:
+                    return
+                if event is _RETRY_SWEEP:
+                    self._sweep()
+                    continue
+                results = self._deliver(event)
+
+                failed = [channel for channel, state in results.items() if state == 'failed']
+                if failed:
+                    _enqueue_retry(failed, event)
+                    results.update({channel: 'retrying' for channel in failed})
+
+                self._record(event, results)
+            except Exception as e:
+                logger.error(f'通知分发异常: {e}')
+            finally:
+                self._queue.task_done()
+
+    def _sweep(self):
+        try:
+            retry_failed_notifications()
+        finally:
+            with self._sweep_lock:
+                self._sweep_pending = False
+
+    def _deliver(self, event: dict) -> Dict[str, str]:
+        """并行发送到所有渠道，返回 渠道 -> 投递状态"""
+        futures = {channel: self._channel_pool.submit(_send_to_channel, channel, event)
+                   for channel in _ALL_CHANNELS}
+
+        results = {}
+        for channel, future in futures.items():
+            try:
+                results[channel] = _delivery_state(future.result())
+            except Exception as e:
+                logger.error(f'{channel} 通知异常: {e}')
+                results[channel] = 'failed'
+        return results
+
+    def record_retry(self, event: dict, channel: str, state: str):
+        """记录重试队列的投递结果"""
+        self._record(event, {channel: state})
+
+    def _record(self, event: dict, results: Dict[str, str]):
+        with self._history_lock:
+            self._history.append({
+                'account_name': event.get('account_name'),
+                'status': event.get('status'),
+                'queued_at': event.get('queued_at'),
+                'finished_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'results': results
+            })
+
+    def recent_deliveries(self, limit: int = 50) -> List[dict]:
+        """最近的投递结果（新的在前）"""
+        with self._history_lock:
+            return list(self._history)[::-1][:limit]
+
+    def pending(self) -> int:
+        """队列中等待发送的通知数"""
+        return self._queue.qsize()
+
+    def stop(self, timeout: float = 10):
+        """等待队列中的通知发送完毕（最多 timeout 秒）后停止工作线程"""
+        self.flush_digest()
+
+        if not self._threads:
+            return
+
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.1)
+
+        for _ in self._threads:
+            try:
+                self._queue.put_nowait(None)
+            except queue.Full:
+                break
+        self._threads = []
+        self._channel_pool.shutdown(wait=False)
+
+
+def _build_digest_event(events: List[dict], started_at: datetime) -> dict:
+    """把一个窗口内的签到结果合并成一条汇总通知"""
+    failed = [e for e in events if e['status'] != 'success']
+    succeeded = len(events) - len(failed)
+
+    lines = [
+        f"📋 签到汇总（{started_at.strftime('%H:%M:%S')} - {datetime.now().strftime('%H:%M:%S')}）",
+        f"共 {len(events)} 个，成功 {succeeded} 个，失败 {len(failed)} 个"
+    ]
+    if failed:
+        lines.append('失败账号:')
+        for e in failed[:DIGEST_MAX_FAILED_LINES]:
+            lines.append(f"❌ {e['account_name']}: {e.get('message', '')}")
+        if len(failed) > DIGEST_MAX_FAILED_LINES:
+            lines.append(f'... 还有 {len(failed) - DIGEST_MAX_FAILED_LINES} 个失败账号')
+
+    text = '\n'.join(lines)
+
+    return {
+        'account_name': '签到汇总',
+        'status': 'failed' if failed else 'success',
+        'response_code': None,
+        'message': text,
+        'response_body': None,
+        'text': text
+    }
+
+
+def _digest_window() -> float:
+    """汇总窗口秒数（配置无效时使用默认值）"""
+    try:
+        window = float(_get_config('digest_window') or DEFAULT_DIGEST_WINDOW)
+    except ValueError:
+        window = DEFAULT_DIGEST_WINDOW
+    return max(window, 1)
+
+
+# 全局通知分发器
+dispatcher = NotificationDispatcher()
+
+
+@db_connection()
+def retry_failed_notifications(batch_size: int = 100) -> int:
+    """
+    发送重试队列中到期的通知（调度进程定期通过 dispatcher.request_retry_sweep 在分发器工作线程中执行）
+
+    每条记录先通过条件更新「认领」（推后下次重试时间），多个进程同时执行时不会重复发送。
+    发送成功或渠道已停用时删除记录；失败时按指数退避重新排期，超过 NOTIFY_MAX_RETRIES 次后放弃。
+
+    Returns:
+        本次发送成功的条数
+    """
+    now = datetime.now()
+    due = list(NotifyOutbox.select()
+               .where(NotifyOutbox.next_attempt_at <= now)
+               .order_by(NotifyOutbox.next_attempt_at)
+               .limit(batch_size))
+
+    sent = 0
+    for item in due:
+        claimed = (NotifyOutbox
+                   .update(next_attempt_at=now + timedelta(seconds=NOTIFY_RETRY_INTERVAL))
+                   .where((NotifyOutbox.id == item.id) & (NotifyOutbox.next_attempt_at == item.next_attempt_at))
+                   .execute())
+        if not claimed:
+            continue
+
+        event = json.loads(item.payload)
+        limiter = _limiters[item.channel]
+        if limiter.ready_in() > NOTIFY_RATE_WAIT:
+            # 渠道仍在限速/退避中，不计入重试次数
+            NotifyOutbox.update(
+                next_attempt_at=datetime.now() + timedelta(seconds=limiter.ready_in())
+            ).where(NotifyOutbox.id == item.id).execute()
+            continue
+
+        try:
+            result = _send_to_channel(item.channel, event)
+        except Exception as e:
+            logger.error(f'{item.channel} 通知重试异常: {e}')
+            result = False
+
+        if result is not False:
+            NotifyOutbox.delete_by_id(item.id)
+            if result:
+                sent += 1
+            dispatcher.record_retry(event, item.channel, _delivery_state(result))
+        elif item.attempts + 1 >= NOTIFY_MAX_RETRIES:
+            NotifyOutbox.delete_by_id(item.id)
+            logger.error(f"{item.channel} 通知重试 {NOTIFY_MAX_RETRIES} 次仍失败，放弃: {event.get('account_name')}")
+            dispatcher.record_retry(event, item.channel, 'failed')
+        else:
+            NotifyOutbox.update(
+                attempts=item.attempts + 1,
+                next_attempt_at=datetime.now() + timedelta(seconds=_retry_delay(item.channel, item.attempts + 1))
+            ).where(NotifyOutbox.id == item.id).execute()
+
+    return sent
+
+
+def pending_retries() -> int:
+    """重试队列中的通知数"""
+    with db_connection():
+        return NotifyOutbox.select().count()
+
+
 def send_all_notifications(account_name: str, status: str, response_code: int = None,
-                           message: str = '', response_body: str = None):
+                           message: str = '', response_body: str = None) -> bool:
     """
-    发送所有启用的通知
+    发送所有启用的通知（异步：放入后台分发队列后立即返回）
+
+    启用汇总模式（digest_enabled）时，结果先进入汇总缓冲区，
+    每个窗口（digest_window 秒）合并发送一条汇总消息。
 
     Args:
         account_name: 账号名称
@@ -231,6 +732,9 @@ def send_all_notifications(account_name: str, status: str, response_code: int =
         response_code: 响应状态码
         message: 消息内容
         response_body: 响应内容（可选）
+
+    Returns:
+        是否成功入队
     """
     # 构造通用消息文本（用于 IM 通知）
     status_emoji = '✅' if status == 'success' else '❌'
@@ -238,12 +742,25 @@ def send_all_notifications(account_name: str, status: str, response_code: int =
     if response_code:
         text_message += f"\nHTTP: {response_code}"
 
-    # 发送所有启用的通知渠道
-    _send_webhook(account_name, status, response_code, message, response_body)
-    _send_telegram(text_message)
-    _send_dingtalk(text_message)
-    _send_wecom(text_message)
-    _send_feishu(text_message)
+    event = {
+        'account_name': account_name,
+        'status': status,
+        'response_code': response_code,
+        'message': message,
+        'response_body': response_body,
+        'text': text_message
+    }
+
+    if not _is_enabled('digest_enabled'):
+        return dispatcher.submit(event)
+
+    # 汇总模式：失败结果可配置为立即单独发送，同时仍计入汇总
+    queued = True
+    if status != 'success' and _is_enabled('digest_failures_immediate'):
+        queued = dispatcher.submit(dict(event))
+
+    dispatcher.add_to_digest(event, _digest_window())
+    return queued
 
 
 # 导出供 app.py 测试接口使用的单独发送函数
@@ -0,0 +1,178 @@
+"""多进程签到执行引擎 - 把签到请求和响应解码分散到多个 CPU 核心
+
+启用方式：设置环境变量 CHECKIN_ENGINE=process。
+
+子进程只负责发送请求并解码响应（不访问数据库、不安排任务），
+结果交回主进程后由 complete_checkin 记录日志、安排重试和发送通知，
+因此调度器、调度租约和通知分发仍然只存在于主进程中。
+"""
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+from .host_limiter import host_limiter
+from .http_pool import session_pool
+from .settings import CHECKIN_PROCESSES, checkin_timeout_for
+
+logger = logging.getLogger(__name__)
+
+# 子进程返回的响应内容长度（与 complete_checkin 保存的长度一致，减少进程间传输）
+RESPONSE_TEXT_LIMIT = 5000
+
+
+def _perform_request(req_params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    在子进程中发送签到请求（每个子进程有自己的 HTTP 会话池）
+
+    Returns:
+        {'response_code': ..., 'response_text': ...} 或 {'error': ...}，即 complete_checkin 的结果参数
+    """
+    try:
+        response = session_pool.request(
+            method=req_params['method'],
+            url=req_params['url'],
+            headers=req_params['headers'],
+            data=req_params['data'],
+            cookies=req_params['cookies'],
+            timeout=checkin_timeout_for(urlsplit(req_params['url']).hostname)
+        )
+    except requests.RequestException as e:
+        return {'error': str(e)}
+
+    return {
+        'response_code': response.status_code,
+        'response_text': response.text[:RESPONSE_TEXT_LIMIT]
+    }
+
+
+class ProcessCheckinEngine:
+    """
+    多进程签到执行引擎
+
+    调度器线程在本进程中完成准备（读取账号、解析 curl，带缓存）后把请求提交到进程池并立即返回，
+    同一时刻到期的大量签到由多个子进程并行执行；结果处理在本进程的小线程池中完成。
+    子进程使用 spawn 方式启动，不继承调度器线程、数据库连接和锁。
+    """
+
+    def __init__(self, prepare: Callable[..., Dict[str, Any]], complete: Callable[..., Dict[str, Any]],
+                 fail: Callable[..., Dict[str, Any]],
+                 processes: int = CHECKIN_PROCESSES):
+        """
+        Args:
+            prepare: 签到准备函数（读取账号、解析 curl），见 scheduler.prepare_checkin
+            complete: 结果处理函数（记录日志、重试、通知），见 scheduler.complete_checkin
+            fail: 非网络异常的处理函数（记录未知错误并通知），见 scheduler.fail_checkin
+            processes: 子进程数
+        """
+        self._prepare = prepare
+        self._complete = complete
+        self._fail = fail
+        self._processes = processes
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()  # 多个调度线程同时提交时，保证只创建/重建一个进程池
+        self._result_pool = ThreadPoolExecutor(max_workers=min(32, processes * 4),
+                                               thread_name_prefix='checkin-result')
+
+    def start(self):
+        """启动进程池"""
+        self._get_pool()
+
+    def _get_pool(self, broken: Optional[ProcessPoolExecutor] = None) -> ProcessPoolExecutor:
+        """
+        获取进程池，不存在时创建
+
+        Args:
+            broken: 已损坏的进程池；当前进程池仍是它时才重建（其他线程可能已经重建过）
+        """
+        with self._pool_lock:
+            if self._pool is not None and self._pool is broken:
+                logger.warning('签到进程池已损坏，重新创建')
+                broken.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self._processes,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+                logger.info(f'多进程签到引擎已启动，子进程数 {self._processes}')
+            return self._pool
+
+    def stop(self):
+        """停止进程池（未开始的请求会被取消）"""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is None:
+            return
+
+        pool.shutdown(wait=False, cancel_futures=True)
+        self._result_pool.shutdown(wait=False)
+
+    def submit(self, account_id: int, retry_attempt: int = 0, skip_enabled_check: bool = False) -> Future:
+        """
+        提交一次签到（请求在子进程中执行，立即返回；目标主机达到 HOST_LIMITS 限制时在限流器中排队）
+
+        Returns:
+            concurrent.futures.Future，结果为执行结果字典
+        """
+        result = Future()
+
+        prepared = self._prepare(account_id, skip_enabled_check)
+        if 'status' in prepared:
+            result.set_result(prepared)
+            return result
+
+        req_params = prepared['req_params']
+        host = urlsplit(req_params['url']).hostname
+
+        def start():
+            try:
+                request_future = self._submit_request(req_params)
+            except Exception as e:
+                host_limiter.release(host)
+                result.set_result(self._fail(account_id, req_params, e))
+                return
+
+            request_future.add_done_callback(
+                lambda f: self._result_pool.submit(
+                    self._finish, f, result, account_id, req_params, retry_attempt, skip_enabled_check
+                )
+            )
+
+        # 主机限流在本进程中完成（HOST_LIMITS 对所有子进程生效），排队时不阻塞调用线程，
+        # 请求结束后在 _finish 中归还许可
+        host_limiter.run(host, start)
+        return result
+
+    def _submit_request(self, req_params: Dict[str, Any]) -> Future:
+        """把请求提交到进程池"""
+        pool = self._get_pool()
+        try:
+            return pool.submit(_perform_request, req_params)
+        except BrokenProcessPool:
+            # 子进程异常退出后进程池不再可用，重建后继续
+            return self._get_pool(broken=pool).submit(_perform_request, req_params)
+
+    def _finish(self, request_future: Future, result: Future, account_id: int, req_params: Dict[str, Any],
+                retry_attempt: int, skip_enabled_check: bool):
+        """在本进程中处理子进程返回的结果"""
+        host_limiter.release(urlsplit(req_params['url']).hostname)
+
+        try:
+            try:
+                outcome = request_future.result()
+            except BrokenProcessPool as e:  # 子进程异常退出，按网络异常处理以便重试
+                logger.error(f'签到子进程执行失败: account_id={account_id} - {e}')
+                outcome = {'error': str(e) or e.__class__.__name__}
+            except Exception as e:  # 子进程中的非网络异常（如请求头包含无法编码的字符）
+                result.set_result(self._fail(account_id, req_params, e))
+                return
+
+            result.set_result(self._complete(account_id, req_params, retry_attempt, skip_enabled_check, **outcome))
+        except Exception as e:
+            logger.error(f'多进程签到结果处理失败: account_id={account_id} - {e}')
+            result.set_result({'status': 'failed', 'error': str(e)})
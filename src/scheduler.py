@@ -1,27 +1,147 @@
 """定时任务调度模块"""
-import time
 import logging
 import re
 import json
 import random
 import shlex
-from datetime import datetime
-from typing import Dict, Any, Optional, Tuple
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import lru_cache
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlsplit
 import requests
+from apscheduler.events import EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED
+from apscheduler.executors.pool import ThreadPoolExecutor
+from apscheduler.jobstores.base import JobLookupError
+from apscheduler.triggers.base import BaseTrigger
 from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.base import STATE_RUNNING
 from apscheduler.triggers.cron import CronTrigger
-from .models import Account, CheckinLog, Config, db
-from .notifier import send_all_notifications
+from apscheduler.triggers.date import DateTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+
+try:
+    from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+except ImportError:  # 可选依赖（SQLAlchemy），未安装时使用内存任务存储
+    SQLAlchemyJobStore = None
+
+from .models import (
+    Account,
+    CheckinLog,
+    db,
+    db_connection,
+    get_config,
+    purge_orphan_snapshots,
+    save_request_snapshot,
+)
+from .notifier import send_all_notifications, dispatcher as notify_dispatcher
+from .async_engine import AsyncCheckinEngine
+from .process_engine import ProcessCheckinEngine
+from .host_limiter import host_limiter
+from .http_pool import session_pool
+from .leader import LeaderLease
+from .settings import (
+    CHECKIN_ENGINE,
+    CRON_SPREAD_SECONDS,
+    CURL_PARSE_CACHE_SIZE,
+    NOTIFY_RETRY_INTERVAL,
+    RECONCILE_INTERVAL,
+    SCHEDULER_JOBSTORE,
+    SCHEDULER_JOBSTORE_URL,
+    SCHEDULER_MISFIRE_GRACE_TIME,
+    SCHEDULER_POOL_SIZE,
+    SCHEDULER_ROLE,
+    checkin_timeout_for,
+)
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # 全局调度器实例
-scheduler = BackgroundScheduler()
+# 任务始终在线程池中执行：子进程中的任务无法访问本进程的调度器（安排重试）、调度租约和通知队列，
+# 需要多核并行时使用 CHECKIN_ENGINE=process，只把请求分散到子进程
+scheduler = BackgroundScheduler(executors={'default': ThreadPoolExecutor(SCHEDULER_POOL_SIZE)})
+
+# curl 解析结果 LRU 缓存（内容哈希 -> 解析结果）
+_curl_cache: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+_curl_cache_lock = threading.Lock()
+
+# async / process 执行引擎（按 CHECKIN_ENGINE 按需创建）
+_engine = None
+_engine_lock = threading.Lock()
+
+# 调度租约（多进程部署时只有持有者注册账号定时任务，见 start_scheduler）
+_lease: Optional[LeaderLease] = None
+_is_leader = False
+
+# 只在持有调度租约的进程中运行的系统任务
+LEADER_SYSTEM_JOBS = ('auto_clean_logs', 'reconcile_jobs', 'retry_notifications')
+
+# 持久化任务存储的别名（SCHEDULER_JOBSTORE=sqlalchemy 时只在调度进程中添加，保存账号任务和重试任务）
+PERSISTENT_JOBSTORE = 'persistent'
+_persistent_jobstore = False
+
+
+def _curl_cache_key(curl_cmd: str) -> str:
+    """curl 命令的缓存键（内容哈希，避免在缓存中保存整段命令文本）"""
+    return hashlib.sha256(curl_cmd.encode('utf-8', 'surrogatepass')).hexdigest()
 
 
 def parse_curl_command(curl_cmd: str) -> Dict[str, Any]:
+    """
+    解析 curl 命令为 requests 参数（带 LRU 缓存）
+
+    相同内容的 curl 命令只分词解析一次，之后直接返回缓存结果的副本。
+    账号修改 curl 后内容哈希随之变化，自然不会命中旧结果。
+
+    Args:
+        curl_cmd: curl 命令字符串
+
+    Returns:
+        包含 url, method, headers, data 等的字典
+    """
+    key = _curl_cache_key(curl_cmd)
+
+    with _curl_cache_lock:
+        cached = _curl_cache.get(key)
+        if cached is not None:
+            _curl_cache.move_to_end(key)
+
+    if cached is None:
+        cached = _parse_curl_command(curl_cmd)
+
+        with _curl_cache_lock:
+            _curl_cache[key] = cached
+            while len(_curl_cache) > CURL_PARSE_CACHE_SIZE:
+                _curl_cache.popitem(last=False)
+
+    # 返回副本，调用方修改 headers/cookies 不会污染缓存
+    return {
+        **cached,
+        'headers': dict(cached['headers']),
+        'cookies': dict(cached['cookies'])
+    }
+
+
+def invalidate_curl_cache(curl_cmd: Optional[str] = None):
+    """
+    清除 curl 解析缓存
+
+    Args:
+        curl_cmd: 指定命令时只清除该命令的缓存，否则清空全部
+    """
+    with _curl_cache_lock:
+        if curl_cmd is None:
+            _curl_cache.clear()
+        else:
+            _curl_cache.pop(_curl_cache_key(curl_cmd), None)
+
+
+def _parse_curl_command(curl_cmd: str) -> Dict[str, Any]:
     """
     解析 curl 命令为 requests 参数（使用 shlex 正确处理引号）
 
@@ -209,47 +329,362 @@ def parse_random_cron(cron_expr: str) -> Tuple[str, Optional[int]]:
     return standard_cron, max_delay_seconds
 
 
-def execute_checkin_with_random_delay(account_id: int, max_delay_seconds: Optional[int] = None):
+@lru_cache(maxsize=256)
+def _build_cron_trigger(standard_cron: str) -> CronTrigger:
     """
-    带随机延迟的签到执行包装函数
-    
+    将 5 段标准 Cron 表达式构造为 CronTrigger
+
+    CronTrigger 不保存运行状态，相同表达式的账号共用同一个实例（批量导入、重载任务时避免重复解析）。
+    """
+    parts = standard_cron.split()
+    if len(parts) != 5:
+        raise ValueError('Cron 表达式格式错误，应为 5 个字段（分 时 日 月 周）')
+
+    minute, hour, day, month, day_of_week = parts
+
+    return CronTrigger(
+        minute=minute,
+        hour=hour,
+        day=day,
+        month=month,
+        day_of_week=day_of_week
+    )
+
+
+# 黄金分割比例：连续的账号 ID 得到的偏移在分散范围内均匀分布
+_SPREAD_RATIO = 0.6180339887498949
+
+
+def _spread_offset(account_id: int) -> int:
+    """账号在分散范围内的固定偏移秒数（只与账号 ID 有关，重启、重建任务后不变）"""
+    return int((account_id * _SPREAD_RATIO) % 1 * CRON_SPREAD_SECONDS)
+
+
+class OffsetCronTrigger(BaseTrigger):
+    """
+    在 CronTrigger 的每次触发时间上加固定偏移
+
+    大量账号使用相同 Cron（如默认的 0 8 * * *）时，按账号 ID 把执行时间错开，
+    避免同一秒内集中请求目标站点。内部的 CronTrigger 仍按表达式共用（见 _build_cron_trigger）。
+    """
+
+    __slots__ = ('trigger', 'offset')
+
+    def __init__(self, trigger: CronTrigger, offset: int):
+        self.trigger = trigger
+        self.offset = timedelta(seconds=offset)
+
+    def _shift(self, fire_time: datetime, delta: timedelta) -> datetime:
+        # 按 UTC 计算，避免夏令时切换时按本地时间相加出现偏差
+        return (fire_time.astimezone(timezone.utc) + delta).astimezone(fire_time.tzinfo)
+
+    def get_next_fire_time(self, previous_fire_time, now):
+        previous = self._shift(previous_fire_time, -self.offset) if previous_fire_time else None
+        fire_time = self.trigger.get_next_fire_time(previous, self._shift(now, -self.offset))
+        return self._shift(fire_time, self.offset) if fire_time else None
+
+    def __getstate__(self):
+        return {'version': 1, 'trigger': self.trigger, 'offset': self.offset}
+
+    def __setstate__(self, state):
+        self.trigger = state['trigger']
+        self.offset = state['offset']
+
+    def __str__(self):
+        return f'{self.trigger} +{int(self.offset.total_seconds())}s'
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} ({self.trigger!r}, offset={int(self.offset.total_seconds())})>'
+
+
+def _account_trigger(account_id: int, standard_cron: str) -> BaseTrigger:
+    """标准 Cron 账号的触发器（设置了 CRON_SPREAD_SECONDS 时加上账号的固定偏移）"""
+    trigger = _build_cron_trigger(standard_cron)
+    offset = _spread_offset(account_id)
+    return OffsetCronTrigger(trigger, offset) if offset else trigger
+
+
+def next_random_fire_time(cron_expr: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    计算随机时间窗口的下一次执行时间
+
+    取下一个窗口的开始时间，再加上窗口内的随机偏移。
+
+    Args:
+        cron_expr: 随机窗口 Cron 表达式，如 "R(09:00-09:30) * * *"
+        now: 计算基准时间，默认为当前时间
+
+    Returns:
+        下一次执行时间；没有后续窗口时返回 None
+    """
+    standard_cron, max_delay_seconds = parse_random_cron(cron_expr)
+    trigger = _build_cron_trigger(standard_cron)
+
+    window_start = trigger.get_next_fire_time(None, now or datetime.now(trigger.timezone))
+    if window_start is None:
+        return None
+
+    return window_start + timedelta(seconds=random.randint(0, max_delay_seconds or 0))
+
+
+def job_options(account: Account) -> Dict[str, Any]:
+    """
+    账号定时任务的执行策略（传给 APScheduler 的 misfire_grace_time / coalesce / max_instances）
+
+    - misfire_grace_time: 错过执行时间（重启、线程池繁忙）后仍补执行的宽限秒数，未设置时使用全局默认，0 表示不限制
+    - coalesce: 错过多次执行时只补执行一次
+    - max_instances: 同一账号允许同时执行的任务数
+    """
+    grace = account.misfire_grace_time
+    if grace is None:
+        grace = SCHEDULER_MISFIRE_GRACE_TIME
+
+    return {
+        'misfire_grace_time': grace or None,
+        'coalesce': bool(account.coalesce),
+        'max_instances': max(account.max_instances or 1, 1)
+    }
+
+
+def _job_signature(cron_expr: str, updated_at: Optional[datetime], options: Optional[Dict[str, Any]] = None) -> str:
+    """
+    账号任务的签名（保存为任务名称）
+
+    同步任务时签名不变的账号保持原任务不动；Cron、执行策略、分散范围或账号修改时间变化时重建任务。
+    """
+    signature = f"{cron_expr}@{updated_at.isoformat() if updated_at else ''}"
+    if CRON_SPREAD_SECONDS:
+        signature += f'~{CRON_SPREAD_SECONDS}'
+    if options:
+        signature += f"#{options['misfire_grace_time']}/{int(options['coalesce'])}/{options['max_instances']}"
+    return signature
+
+
+def _job_store() -> str:
+    """账号任务和重试任务使用的任务存储"""
+    return PERSISTENT_JOBSTORE if _persistent_jobstore else 'default'
+
+
+def _schedule_random_occurrence(account_id: int, cron_expr: str, signature: Optional[str] = None,
+                                options: Optional[Dict[str, Any]] = None):
+    """为随机窗口账号注册下一次的一次性任务"""
+    if not _is_leader:
+        return
+
+    run_date = next_random_fire_time(cron_expr)
+    if run_date is None:
+        return
+
+    scheduler.add_job(
+        func=execute_random_checkin,
+        trigger=DateTrigger(run_date=run_date),
+        args=[account_id, cron_expr],
+        id=f'account_{account_id}',
+        name=signature or _job_signature(cron_expr, None),
+        jobstore=_job_store(),
+        replace_existing=True,
+        **(options or {'misfire_grace_time': None})
+    )
+    logger.info(f'账号 {account_id} 下一次随机签到时间: {run_date.strftime("%Y-%m-%d %H:%M:%S")}')
+
+
+def execute_random_checkin(account_id: int, cron_expr: str):
+    """
+    随机窗口任务：执行签到，并为下一个窗口安排新的随机执行时间
+
     Args:
         account_id: 账号ID
-        max_delay_seconds: 最大随机延迟秒数，None 表示立即执行
+        cron_expr: 注册该任务时使用的随机窗口 Cron 表达式
     """
-    if max_delay_seconds:
-        # 随机延迟 0 到 max_delay_seconds 秒
-        delay = random.randint(0, max_delay_seconds)
-        logger.info(f'账号 {account_id} 将在 {delay} 秒后执行签到（随机延迟）')
-        time.sleep(delay)
-    
-    # 执行签到
-    execute_checkin(account_id)
+    try:
+        run_checkin(account_id)
+    finally:
+        try:
+            with db_connection():
+                account = Account.get_or_none(Account.id == account_id)
+            # 账号被删除、禁用或修改了 Cron 时，不再沿用旧的表达式续排
+            if (account and account.enabled and account.cron_expr == cron_expr
+                    and not scheduler.get_job(f'account_{account_id}')):
+                options = job_options(account)
+                _schedule_random_occurrence(account_id, cron_expr,
+                                            _job_signature(cron_expr, account.updated_at, options), options)
+        except Exception as e:
+            logger.error(f'安排下一次随机签到失败: account_id={account_id} - {e}')
+
+
+def _on_job_skipped(event):
+    """
+    任务因错过执行时间或达到最大并发实例数被跳过时的监听器
 
+    随机窗口任务的下一次执行由 execute_random_checkin 在执行结束时安排，被跳过时不会执行，
+    需要在这里补排，否则直到下一次 reconcile_jobs（RECONCILE_INTERVAL=0 时永远不会）都没有任务。
+    """
+    match = ACCOUNT_JOB_ID.fullmatch(event.job_id)
+    if match:
+        # 监听器可能在调度器主循环中调用（持有任务存储锁，被跳过的一次性任务随后才会被移除），
+        # 在新线程中补排，添加任务时等待主循环处理完毕
+        threading.Thread(target=_reschedule_random_checkin, args=(int(match.group(1)),),
+                         name='random-reschedule', daemon=True).start()
 
-def execute_checkin(account_id: int, retry_attempt: int = 0, skip_enabled_check: bool = False) -> Dict[str, Any]:
+
+def _reschedule_random_checkin(account_id: int):
+    """为没有待执行任务的随机窗口账号安排下一次执行"""
+    try:
+        with db_connection():
+            account = Account.get_or_none(Account.id == account_id)
+        if account is None or not account.enabled:
+            return
+
+        _, max_delay_seconds = parse_random_cron(account.cron_expr)
+        if not max_delay_seconds or scheduler.get_job(f'account_{account_id}'):
+            return
+
+        logger.warning(f'账号 {account_id} 的随机签到被跳过，安排下一次执行')
+        options = job_options(account)
+        _schedule_random_occurrence(account_id, account.cron_expr,
+                                    _job_signature(account.cron_expr, account.updated_at, options), options)
+    except Exception as e:
+        logger.error(f'安排下一次随机签到失败: account_id={account_id} - {e}')
+
+
+def get_next_run_time(account_id: int, cron_expr: Optional[str] = None) -> Optional[datetime]:
+    """
+    获取账号定时任务的下一次执行时间
+
+    未持有调度租约的进程中没有账号任务，标准 Cron 按表达式推算；
+    随机窗口的具体时间只有调度进程知道，返回 None。
+    """
+    job = scheduler.get_job(f'account_{account_id}')
+    if job:
+        # 调度器启动前，待添加的任务尚未计算 next_run_time
+        return getattr(job, 'next_run_time', None)
+
+    if _is_leader or not cron_expr:
+        return None
+
+    try:
+        standard_cron, max_delay_seconds = parse_random_cron(cron_expr)
+        if max_delay_seconds:
+            return None
+        tz = _build_cron_trigger(standard_cron).timezone
+        return _account_trigger(account_id, standard_cron).get_next_fire_time(None, datetime.now(tz))
+    except ValueError:
+        return None
+
+
+def _retry_job_id(account_id: int, manual: bool) -> str:
+    """重试任务ID（手动签到和定时签到的重试互不覆盖）"""
+    return f'account_{account_id}_retry_{"manual" if manual else "cron"}'
+
+
+def schedule_retry(account_id: int, retry_attempt: int, delay: int, skip_enabled_check: bool = False):
     """
-    执行签到任务
+    以一次性任务（date 触发器）安排下一次重试
+
+    重试等待由调度器计时完成，不占用工作线程。
 
     Args:
         account_id: 账号ID
-        retry_attempt: 当前重试次数
-        skip_enabled_check: 是否跳过禁用状态检查（手动签到时为 True）
+        retry_attempt: 下一次执行对应的重试次数
+        delay: 延迟秒数
+        skip_enabled_check: 是否跳过禁用状态检查
+    """
+    job_id = _retry_job_id(account_id, skip_enabled_check)
 
-    Returns:
-        执行结果字典
+    # 调度租约变化前安排的重试可能在另一个任务存储中
+    if scheduler.get_job(job_id):
+        scheduler.remove_job(job_id)
+
+    scheduler.add_job(
+        func=run_checkin,
+        trigger=DateTrigger(run_date=datetime.now() + timedelta(seconds=max(delay, 0))),
+        args=[account_id, retry_attempt, skip_enabled_check],
+        id=job_id,
+        jobstore=_job_store(),
+        replace_existing=True,
+        misfire_grace_time=None  # 线程池繁忙时延后执行，而不是丢弃重试
+    )
+
+
+def _save_log(account: Account, req_params: Dict[str, Any], **fields) -> CheckinLog:
+    """记录签到日志（请求参数保存为去重后的请求快照）"""
+    headers = req_params.get('headers', {})
+    cookies = req_params.get('cookies', {})
+
+    # 快照和引用它的记录在同一事务中写入，避免期间被 purge_orphan_snapshots 当作孤立快照删除
+    with db.atomic():
+        snapshot_id = save_request_snapshot(
+            req_params.get('method'),
+            req_params.get('url'),
+            json.dumps(headers, ensure_ascii=False) if headers else None,
+            json.dumps(cookies, ensure_ascii=False) if cookies else None,
+            req_params.get('data')
+        )
+
+        log = CheckinLog.create(
+            account=account,
+            executed_at=datetime.now(),
+            request_snapshot=snapshot_id,
+            **fields
+        )
+    return log
+
+
+def _record_unknown_error(account: Account, req_params: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+    """记录未知错误（不重试）"""
+    logger.error(f'未知错误: {account.name} - {error}')
+
+    _save_log(
+        account,
+        req_params,
+        status='failed',
+        response_code=None,
+        response_body=None,
+        error_message=str(error)[:500]
+    )
+
+    # 调用 Webhook
+    send_all_notifications(
+        account_name=account.name,
+        status='failed',
+        response_code=None,
+        message=f'未知错误: {str(error)}'
+    )
+
+    return {'status': 'failed', 'error': str(error)}
+
+
+@db_connection()
+def fail_checkin(account_id: int, req_params: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+    """
+    发起请求时出现非网络异常：记录未知错误并通知（不重试）
+
+    thread / async / process 引擎共用。
+    """
+    account = Account.get_or_none(Account.id == account_id)
+    if account is None:
+        return {'status': 'failed', 'error': f'账号不存在: {account_id}'}
+
+    return _record_unknown_error(account, req_params, error)
+
+
+@db_connection()
+def prepare_checkin(account_id: int, skip_enabled_check: bool = False) -> Dict[str, Any]:
     """
-    db.connect(reuse_if_open=True)
+    签到前的准备：读取账号并解析 curl 命令
 
-    # 初始化变量，避免异常时未定义
-    account = None
-    req_params = {}
+    Args:
+        account_id: 账号ID
+        skip_enabled_check: 是否跳过禁用状态检查
 
+    Returns:
+        可以发起请求时返回 {'req_params': ...}；
+        否则返回带 status 的最终结果（账号不存在、已禁用或解析失败）
+    """
     try:
         account = Account.get_by_id(account_id)
     except Exception as e:
         logger.error(f'获取账号失败: account_id={account_id}, error={e}')
-        db.close()
         return {'status': 'failed', 'error': f'账号不存在: {account_id}'}
 
     try:
@@ -258,161 +693,240 @@ def execute_checkin(account_id: int, retry_attempt: int = 0, skip_enabled_check:
             return {'status': 'skipped', 'message': '账号已禁用'}
 
         # 解析 curl 命令
-        req_params = parse_curl_command(account.curl_command)
-
-        # 使用循环重试，避免递归导致栈溢出和线程阻塞
-        for attempt in range(account.retry_count + 1):
-            try:
-                # 执行请求
-                # logger.info(f'开始执行签到: {account.name} (尝试 {attempt + 1}/{account.retry_count + 1})')
-
-                response = requests.request(
-                    method=req_params['method'],
-                    url=req_params['url'],
-                    headers=req_params['headers'],
-                    data=req_params['data'],
-                    cookies=req_params['cookies'],
-                    timeout=30
-                )
-
-                # 判断是否成功（2xx 状态码）
-                is_success = 200 <= response.status_code < 300
-
-                headers = req_params.get('headers', {})
-                cookies = req_params.get('cookies', {})
-
-                # 记录日志（保存请求参数，敏感信息已脱敏）
-                log = CheckinLog.create(
-                    account=account,
-                    status='success' if is_success else 'failed',
-                    response_code=response.status_code,
-                    response_body=response.text[:5000],  # 限制长度（增加到5000字符）
-                    error_message=None if is_success else f'HTTP {response.status_code}',
-                    executed_at=datetime.now(),
-                    # 保存请求参数（敏感信息已脱敏）
-                    request_method=req_params['method'],
-                    request_url=req_params['url'],
-                    request_headers=json.dumps(headers, ensure_ascii=False) if headers else None,
-                    request_cookies=json.dumps(cookies, ensure_ascii=False) if cookies else None,
-                    request_data=req_params['data']
-                )
-
-                if is_success:
-                    # logger.info(f'签到成功: {account.name} - HTTP {response.status_code}')
-
-                    # 调用 Webhook
-                    send_all_notifications(
-                        account_name=account.name,
-                        status='success',
-                        response_code=response.status_code,
-                        message='签到成功',
-                        response_body=response.text[:5000]  # 传递响应内容
-                    )
-
-                    return {
-                        'status': 'success',
-                        'code': response.status_code,
-                        'log_id': log.id
-                    }
-                else:
-                    # 失败且未达到重试上限，继续重试
-                    if attempt < account.retry_count:
-                        logger.warning(f'签到失败，{account.retry_interval}秒后重试: {account.name}')
-                        time.sleep(account.retry_interval)
-                        continue  # 继续下一次重试
-                    else:
-                        logger.error(f'签到失败（已达重试上限）: {account.name}')
-
-                        # 调用 Webhook
-                        send_all_notifications(
-                            account_name=account.name,
-                            status='failed',
-                            response_code=response.status_code,
-                            message=f'签到失败: HTTP {response.status_code}',
-                            response_body=response.text[:5000]  # 传递响应内容
-                        )
-
-                        return {
-                            'status': 'failed',
-                            'code': response.status_code,
-                            'log_id': log.id
-                        }
-
-            except requests.RequestException as e:
-                # 网络错误
-                error_msg = str(e)
-                logger.error(f'请求异常: {account.name} - {error_msg}')
-
-                headers = req_params.get('headers', {})
-                cookies = req_params.get('cookies', {})
-
-                CheckinLog.create(
-                    account=account,
-                    status='failed',
-                    response_code=None,
-                    response_body=None,
-                    error_message=error_msg[:500],
-                    executed_at=datetime.now(),
-                    # 保存请求参数（敏感信息已脱敏）
-                    request_method=req_params.get('method'),
-                    request_url=req_params.get('url'),
-                    request_headers=json.dumps(headers, ensure_ascii=False) if headers else None,
-                    request_cookies=json.dumps(cookies, ensure_ascii=False) if cookies else None,
-                    request_data=req_params.get('data')
-                )
-
-                # 重试逻辑
-                if attempt < account.retry_count:
-                    logger.warning(f'网络异常，{account.retry_interval}秒后重试: {account.name}')
-                    time.sleep(account.retry_interval)
-                    continue  # 继续下一次重试
-
-                # 最后一次失败，调用 Webhook
-                send_all_notifications(
-                    account_name=account.name,
-                    status='failed',
-                    response_code=None,
-                    message=f'网络异常: {error_msg}'
-                )
-
-                return {'status': 'failed', 'error': error_msg}
+        return {'req_params': parse_curl_command(account.curl_command)}
 
     except Exception as e:
-        logger.error(f'未知错误: {account.name} - {e}')
+        return _record_unknown_error(account, {}, e)
 
-        headers = req_params.get('headers', {})
-        cookies = req_params.get('cookies', {})
 
-        CheckinLog.create(
-            account=account,
-            status='failed',
-            response_code=None,
-            response_body=None,
-            error_message=str(e)[:500],
-            executed_at=datetime.now(),
-            # 保存请求参数（敏感信息已脱敏）
-            request_method=req_params.get('method'),
-            request_url=req_params.get('url'),
-            request_headers=json.dumps(headers, ensure_ascii=False) if headers else None,
-            request_cookies=json.dumps(cookies, ensure_ascii=False) if cookies else None,
-            request_data=req_params.get('data')
+@db_connection()
+def complete_checkin(account_id: int, req_params: Dict[str, Any], retry_attempt: int = 0,
+                     skip_enabled_check: bool = False, response_code: Optional[int] = None,
+                     response_text: Optional[str] = None, error: Optional[str] = None) -> Dict[str, Any]:
+    """
+    处理一次签到请求的结果：记录日志、安排重试或发送通知
+
+    与发起请求的方式无关，thread / async / process 引擎共用。
+
+    Args:
+        account_id: 账号ID
+        req_params: 本次请求参数
+        retry_attempt: 当前重试次数
+        skip_enabled_check: 是否跳过禁用状态检查（重试时沿用）
+        response_code: 响应状态码（网络异常时为 None）
+        response_text: 响应内容
+        error: 网络异常信息（请求成功返回时为 None）
+
+    Returns:
+        执行结果字典（status 为 success / failed / retrying）
+    """
+    account = Account.get_or_none(Account.id == account_id)
+    if account is None:
+        return {'status': 'failed', 'error': f'账号不存在: {account_id}'}
+
+    try:
+        can_retry = retry_attempt < account.retry_count
+
+        if error is not None:
+            # 网络错误
+            _save_log(
+                account,
+                req_params,
+                status='failed',
+                response_code=None,
+                response_body=None,
+                error_message=error[:500]
+            )
+
+            # 重试逻辑
+            if can_retry:
+                logger.warning(f'网络异常，{account.retry_interval}秒后重试: {account.name}')
+                schedule_retry(account.id, retry_attempt + 1, account.retry_interval, skip_enabled_check)
+                return {'status': 'retrying', 'error': error, 'retry_attempt': retry_attempt + 1}
+
+            # 最后一次失败，调用 Webhook
+            send_all_notifications(
+                account_name=account.name,
+                status='failed',
+                response_code=None,
+                message=f'网络异常: {error}'
+            )
+
+            return {'status': 'failed', 'error': error}
+
+        # 判断是否成功（2xx 状态码）
+        is_success = 200 <= response_code < 300
+        response_body = (response_text or '')[:5000]  # 限制长度（增加到5000字符）
+
+        log = _save_log(
+            account,
+            req_params,
+            status='success' if is_success else 'failed',
+            response_code=response_code,
+            response_body=response_body,
+            error_message=None if is_success else f'HTTP {response_code}'
         )
 
+        if is_success:
+            # logger.info(f'签到成功: {account.name} - HTTP {response_code}')
+
+            # 调用 Webhook
+            send_all_notifications(
+                account_name=account.name,
+                status='success',
+                response_code=response_code,
+                message='签到成功',
+                response_body=response_body  # 传递响应内容
+            )
+
+            return {
+                'status': 'success',
+                'code': response_code,
+                'log_id': log.id
+            }
+
+        # 失败且未达到重试上限，安排重试
+        if can_retry:
+            logger.warning(f'签到失败，{account.retry_interval}秒后重试: {account.name}')
+            schedule_retry(account.id, retry_attempt + 1, account.retry_interval, skip_enabled_check)
+            return {
+                'status': 'retrying',
+                'code': response_code,
+                'log_id': log.id,
+                'retry_attempt': retry_attempt + 1
+            }
+
+        logger.error(f'签到失败（已达重试上限）: {account.name}')
+
         # 调用 Webhook
         send_all_notifications(
             account_name=account.name,
             status='failed',
-            response_code=None,
-            message=f'未知错误: {str(e)}'
+            response_code=response_code,
+            message=f'签到失败: HTTP {response_code}',
+            response_body=response_body  # 传递响应内容
         )
 
-        return {'status': 'failed', 'error': str(e)}
-        
-    finally:
-        db.close()
+        return {
+            'status': 'failed',
+            'code': response_code,
+            'log_id': log.id
+        }
+
+    except Exception as e:
+        return _record_unknown_error(account, req_params, e)
+
+
+def _send_checkin(account_id: int, req_params: Dict[str, Any], retry_attempt: int = 0,
+                  skip_enabled_check: bool = False) -> Dict[str, Any]:
+    """发送签到请求并处理结果（thread 引擎，在当前线程中同步完成）"""
+    try:
+        # 执行请求
+        # logger.info(f'开始执行签到: account_id={account_id} (重试 {retry_attempt})')
+        response = session_pool.request(
+            method=req_params['method'],
+            url=req_params['url'],
+            headers=req_params['headers'],
+            data=req_params['data'],
+            cookies=req_params['cookies'],
+            timeout=checkin_timeout_for(urlsplit(req_params['url']).hostname)
+        )
+    except requests.RequestException as e:
+        logger.error(f'请求异常: account_id={account_id} - {e}')
+        return complete_checkin(account_id, req_params, retry_attempt, skip_enabled_check, error=str(e))
+    except Exception as e:  # 如请求头包含无法编码的字符
+        return fail_checkin(account_id, req_params, e)
+
+    return complete_checkin(
+        account_id,
+        req_params,
+        retry_attempt,
+        skip_enabled_check,
+        response_code=response.status_code,
+        response_text=response.text
+    )
+
+
+def submit_checkin(account_id: int, retry_attempt: int = 0, skip_enabled_check: bool = False) -> Future:
+    """
+    提交一次签到（thread 引擎）
+
+    目标主机不受 HOST_LIMITS 限制时在当前线程中完成；受限时放入该主机的队列后立即返回，
+    由限流器在轮到时执行，排队期间不占用调度器工作线程。
+    失败且未达到重试上限时，通过 schedule_retry 安排一次性重试任务。
+
+    Returns:
+        concurrent.futures.Future，结果为执行结果字典（status 为 success / failed / retrying / skipped）
+    """
+    prepared = prepare_checkin(account_id, skip_enabled_check)
+    if 'status' in prepared:
+        future = Future()
+        future.set_result(prepared)
+        return future
+
+    req_params = prepared['req_params']
+    return host_limiter.submit(urlsplit(req_params['url']).hostname, _send_checkin,
+                               account_id, req_params, retry_attempt, skip_enabled_check)
+
+
+def execute_checkin(account_id: int, retry_attempt: int = 0, skip_enabled_check: bool = False) -> Dict[str, Any]:
+    """
+    执行签到任务并等待结果（手动签到使用）
+
+    Args:
+        account_id: 账号ID
+        retry_attempt: 当前重试次数
+        skip_enabled_check: 是否跳过禁用状态检查（手动签到时为 True）
 
+    Returns:
+        执行结果字典（status 为 success / failed / retrying / skipped）
+    """
+    return submit_checkin(account_id, retry_attempt, skip_enabled_check).result()
+
+
+def _get_engine():
+    """按需创建 async / process 执行引擎（thread 引擎或缺少依赖时返回 None）"""
+    global _engine
+
+    if CHECKIN_ENGINE not in ('async', 'process'):
+        return None
+
+    if _engine is not None:
+        return _engine
+
+    # 首次定时触发时多个调度线程会同时到达，加锁避免重复创建引擎（泄漏进程池或事件循环）
+    with _engine_lock:
+        if _engine is None:
+            if CHECKIN_ENGINE == 'process':
+                engine = ProcessCheckinEngine(prepare_checkin, complete_checkin, fail_checkin)
+            elif AsyncCheckinEngine.is_available():
+                engine = AsyncCheckinEngine(prepare_checkin, complete_checkin, fail_checkin)
+            else:
+                logger.warning('CHECKIN_ENGINE=async 需要安装 httpx，已回退到线程引擎')
+                return None
+            engine.start()
+            _engine = engine
+
+    return _engine
+
+
+def run_checkin(account_id: int, retry_attempt: int = 0, skip_enabled_check: bool = False):
+    """
+    定时任务入口：按 CHECKIN_ENGINE 分发签到
 
-def add_job(account_id: int, cron_expr: str):
+    async / process 引擎下只把签到提交到事件循环或进程池后立即返回，调度线程不等待请求完成。
+    """
+    engine = _get_engine()
+    if engine is not None:
+        engine.submit(account_id, retry_attempt, skip_enabled_check)
+        return
+
+    # 目标主机排队时不等待（见 submit_checkin）
+    submit_checkin(account_id, retry_attempt, skip_enabled_check)
+
+
+def add_job(account_id: int, cron_expr: str, updated_at: Optional[datetime] = None,
+            options: Optional[Dict[str, Any]] = None):
     """
     添加定时任务
     
@@ -423,114 +937,299 @@ def add_job(account_id: int, cron_expr: str):
     Args:
         account_id: 账号ID
         cron_expr: Cron 表达式
+        updated_at: 账号修改时间（写入任务签名，见 reconcile_jobs）
+        options: 执行策略（见 job_options），不传时使用调度器默认值
+
+    未持有调度租约时只校验表达式，由调度进程定期同步时注册任务。
     """
+    if not _is_leader:
+        validate_cron_expr(cron_expr)
+        return
+
     job_id = f'account_{account_id}'
     
     # 移除旧任务（如果存在）
     if scheduler.get_job(job_id):
         scheduler.remove_job(job_id)
-    
+
+    _register_job(account_id, cron_expr, _job_signature(cron_expr, updated_at, options), options)
+
+
+def _register_job(account_id: int, cron_expr: str, signature: str, options: Optional[Dict[str, Any]]):
+    """注册账号定时任务（同一任务存储中的旧任务直接替换）"""
     # 解析 Cron 表达式（支持随机时间窗口）
     standard_cron, max_delay_seconds = parse_random_cron(cron_expr)
     
-    # 解析标准 Cron 表达式
-    parts = standard_cron.split()
-    if len(parts) != 5:
-        raise ValueError('Cron 表达式格式错误，应为 5 个字段（分 时 日 月 周）')
-    
-    minute, hour, day, month, day_of_week = parts
-    
-    # 根据是否有随机延迟选择执行函数
     if max_delay_seconds:
-        # 随机模式：使用带延迟的包装函数
-        func = execute_checkin_with_random_delay
-        args = [account_id, max_delay_seconds]
+        # 随机模式：预先算出本次窗口内的随机时间，注册为一次性任务
+        _schedule_random_occurrence(account_id, cron_expr, signature, options)
         logger.info(f'已添加随机定时任务: account_id={account_id}, cron={cron_expr}, 随机窗口={max_delay_seconds}秒')
-    else:
-        # 标准模式：直接执行
-        func = execute_checkin
-        args = [account_id]
-        # logger.info(f'已添加定时任务: account_id={account_id}, cron={cron_expr}')
+        return
     
-    # 添加新任务
+    # 标准模式：直接执行
+    # logger.info(f'已添加定时任务: account_id={account_id}, cron={cron_expr}')
     scheduler.add_job(
-        func=func,
-        trigger=CronTrigger(
-            minute=minute,
-            hour=hour,
-            day=day,
-            month=month,
-            day_of_week=day_of_week
-        ),
-        args=args,
-        id=job_id,
-        replace_existing=True
+        func=run_checkin,
+        trigger=_account_trigger(account_id, standard_cron),
+        args=[account_id],
+        id=f'account_{account_id}',
+        name=signature,
+        jobstore=_job_store(),
+        replace_existing=True,
+        **(options or {})
     )
 
 
-def remove_job(account_id: int):
-    """移除定时任务"""
-    job_id = f'account_{account_id}'
-    if scheduler.get_job(job_id):
-        scheduler.remove_job(job_id)
-       # logger.info(f'已移除定时任务: account_id={account_id}')
+def validate_cron_expr(cron_expr: str):
+    """校验 Cron 表达式（支持随机时间窗口语法），无效时抛出 ValueError"""
+    standard_cron, _ = parse_random_cron(cron_expr)
+    _build_cron_trigger(standard_cron)
 
 
-def reload_all_jobs():
-    """重新加载所有启用的账号任务"""
-    db.connect(reuse_if_open=True)
-    
+def add_jobs(accounts: List[Account]) -> Dict[int, str]:
+    """
+    批量添加定时任务（导入、批量操作时使用）
+
+    Args:
+        accounts: 账号列表（需包含 Cron、修改时间和执行策略字段）
+
+    Returns:
+        添加失败的账号 {账号ID: 错误信息}
+    """
+    errors = {}
+    if not _is_leader or not scheduler.running:
+        for account in accounts:
+            try:
+                add_job(account.id, account.cron_expr, account.updated_at, job_options(account))
+            except Exception as e:
+                errors[account.id] = str(e)
+        return errors
+
+    # 一次性列出其他任务存储中的旧任务（调度租约变化前注册的），同一存储中的任务由 replace_existing 直接替换，
+    # 不再逐个账号 get_job / remove_job
+    target = _job_store()
+    stale = {job.id: alias
+             for alias in ('default', PERSISTENT_JOBSTORE) if alias != target
+             for job in scheduler.get_jobs(jobstore=alias)}
+
+    # 暂停期间添加任务不会逐个唤醒调度线程重新计算下一次唤醒时间
+    paused = scheduler.state == STATE_RUNNING
+    if paused:
+        scheduler.pause()
     try:
-        # 清空所有任务
-        scheduler.remove_all_jobs()
-        
-        # 加载启用的账号
-        accounts = Account.select().where(Account.enabled == True)
-        
         for account in accounts:
             try:
-                add_job(account.id, account.cron_expr)
+                options = job_options(account)
+                job_id = f'account_{account.id}'
+                if job_id in stale:
+                    scheduler.remove_job(job_id, jobstore=stale[job_id])
+                _register_job(account.id, account.cron_expr,
+                              _job_signature(account.cron_expr, account.updated_at, options), options)
             except Exception as e:
-                logger.error(f'加载任务失败: {account.name} - {e}')
-        
-      #  logger.info(f'已重新加载 {len(accounts)} 个定时任务')
-        
+                errors[account.id] = str(e)
     finally:
-        db.close()
+        if paused:
+            scheduler.resume()
+    return errors
 
 
-def start_scheduler():
-    """启动调度器"""
-    if not scheduler.running:
-        scheduler.start()
-        reload_all_jobs()
-        
-        # 添加自动清理任务（每天凌晨 3:00 执行）
+def remove_job(account_id: int):
+    """移除定时任务（包括待执行的重试任务）"""
+    for job_id in (f'account_{account_id}', _retry_job_id(account_id, False), _retry_job_id(account_id, True)):
+        if scheduler.get_job(job_id):
+            scheduler.remove_job(job_id)
+       # logger.info(f'已移除定时任务: account_id={account_id}')
+
+
+def remove_jobs(account_ids: List[int]):
+    """批量移除定时任务（包括待执行的重试任务）"""
+    for account_id in account_ids:
+        remove_job(account_id)
+
+
+# 账号定时任务 ID（不包括重试任务和系统任务）
+ACCOUNT_JOB_ID = re.compile(r'account_(\d+)')
+
+
+@db_connection()
+def reconcile_jobs() -> Dict[str, int]:
+    """
+    增量同步定时任务与账号表
+
+    对比现有任务与启用的账号（ID + Cron + 修改时间，见 _job_signature），
+    只添加缺失的、重建变化的、移除多余的账号任务；重试任务和系统任务不受影响。
+    可以定期执行，用于发现其他进程对账号的修改。
+
+    Returns:
+        各类变更的数量
+    """
+    desired = {
+        f'account_{account.id}': account
+        for account in Account
+        .select(Account.id, Account.name, Account.cron_expr, Account.updated_at,
+                Account.misfire_grace_time, Account.coalesce, Account.max_instances)
+        .where(Account.enabled == True)
+    }
+    current = {job.id: job for job in scheduler.get_jobs() if ACCOUNT_JOB_ID.fullmatch(job.id)}
+
+    stats = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0, 'failed': 0}
+
+    for job_id in current.keys() - desired.keys():
+        try:
+            scheduler.remove_job(job_id)
+            stats['removed'] += 1
+        except JobLookupError:
+            pass  # 任务已执行完毕（一次性任务）或被其他线程移除
+
+    for job_id, account in desired.items():
+        job = current.get(job_id)
+        options = job_options(account)
+        if job is not None and job.name == _job_signature(account.cron_expr, account.updated_at, options):
+            stats['unchanged'] += 1
+            continue
+
+        try:
+            add_job(account.id, account.cron_expr, account.updated_at, options)
+            stats['updated' if job is not None else 'added'] += 1
+        except Exception as e:
+            stats['failed'] += 1
+            logger.error(f'加载任务失败: {account.name} - {e}')
+
+    if any(stats[key] for key in ('added', 'updated', 'removed', 'failed')):
+        logger.info(f'定时任务同步完成: {stats}')
+    return stats
+
+
+def reload_all_jobs():
+    """重新加载所有启用的账号任务（增量同步，见 reconcile_jobs）"""
+    reconcile_jobs()
+
+
+def is_leader() -> bool:
+    """当前进程是否负责执行定时签到"""
+    return _is_leader
+
+
+def _add_persistent_jobstore() -> bool:
+    """
+    添加持久化任务存储（SCHEDULER_JOBSTORE=sqlalchemy）
+
+    任务连同下一次执行时间保存在数据库中，调度进程重启或切换后继续使用：
+    重启期间到期的任务按各账号的 misfire_grace_time / coalesce 补执行，已抽取的随机时间和待执行的重试不会丢失。
+    """
+    if SCHEDULER_JOBSTORE != 'sqlalchemy':
+        return False
+
+    if SQLAlchemyJobStore is None:
+        logger.warning('SCHEDULER_JOBSTORE=sqlalchemy 需要安装 sqlalchemy，已回退到内存任务存储')
+        return False
+
+    url = SCHEDULER_JOBSTORE_URL or f'sqlite:///{db.database}'
+    scheduler.add_jobstore(SQLAlchemyJobStore(url=url, tablename='apscheduler_jobs'), PERSISTENT_JOBSTORE)
+    return True
+
+
+def _become_leader():
+    """获得调度租约：加载持久化任务，注册所有账号任务和系统任务"""
+    global _is_leader, _persistent_jobstore
+    _is_leader = True
+
+    try:
+        _persistent_jobstore = _add_persistent_jobstore()
+    except Exception as e:
+        logger.error(f'添加持久化任务存储失败，使用内存任务存储: {e}')
+
+    # 持久化存储中已有的任务签名不变时保持原样（包括下一次执行时间）
+    reload_all_jobs()
+
+    # 添加自动清理任务（每天凌晨 3:00 执行）
+    scheduler.add_job(
+        func=auto_clean_logs,
+        trigger=CronTrigger(hour=3, minute=0),
+        id='auto_clean_logs',
+        replace_existing=True
+    )
+
+    # 定期同步账号任务（发现 Web 进程或其他进程对账号的修改）
+    if RECONCILE_INTERVAL:
         scheduler.add_job(
-            func=auto_clean_logs,
-            trigger=CronTrigger(hour=3, minute=0),
-            id='auto_clean_logs',
+            func=reconcile_jobs,
+            trigger=IntervalTrigger(seconds=RECONCILE_INTERVAL),
+            id='reconcile_jobs',
+            coalesce=True,
             replace_existing=True
         )
-        logger.info('调度器已启动，自动清理任务已添加')
+    # 通知重试任务（发送失败或被限流的通知）：只在调度进程中发送，渠道限速不会因多个进程同时重试而成倍增加；
+    # 扫描交给通知分发器的工作线程，等待限速时不占用调度线程
+    scheduler.add_job(
+        func=notify_dispatcher.request_retry_sweep,
+        trigger=IntervalTrigger(seconds=NOTIFY_RETRY_INTERVAL),
+        id='retry_notifications',
+        coalesce=True,
+        replace_existing=True
+    )
+    logger.info('当前进程负责执行定时签到，账号任务、自动清理任务和通知重试任务已添加')
+
+
+def _step_down():
+    """失去调度租约：移除账号任务和系统任务，已安排的重试任务照常执行"""
+    global _is_leader, _persistent_jobstore
+    _is_leader = False
+
+    # 只卸载持久化存储，其中的任务留给下一个调度进程
+    if _persistent_jobstore:
+        _persistent_jobstore = False
+        try:
+            scheduler.remove_jobstore(PERSISTENT_JOBSTORE)
+        except KeyError:
+            pass
+
+    for job in scheduler.get_jobs():
+        if ACCOUNT_JOB_ID.fullmatch(job.id) or job.id in LEADER_SYSTEM_JOBS:
+            try:
+                scheduler.remove_job(job.id)
+            except JobLookupError:
+                pass
+    logger.info('当前进程不再执行定时签到，账号任务已移除')
 
 
+def start_scheduler():
+    """
+    启动调度器
+
+    多个进程（如 gunicorn 多 worker、多实例部署）共用一个数据库时，
+    通过调度租约保证只有一个进程注册账号定时任务，其余进程只处理 Web 请求；
+    持有者退出后由其他进程在租约有效期内接管。
+    手动签到的重试任务在每个进程中都会运行，通知重试任务只在持有者中运行。
+    """
+    global _lease
+
+    if not scheduler.running:
+        scheduler.start()
+        scheduler.add_listener(_on_job_skipped, EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES)
+
+        if SCHEDULER_ROLE == 'web':
+            logger.info('调度器已启动（SCHEDULER_ROLE=web，不执行定时签到）')
+            return
+
+        _lease = LeaderLease('scheduler', on_elected=_become_leader, on_demoted=_step_down)
+        _lease.start()
+        logger.info(f'调度器已启动，{"已" if _is_leader else "未"}获得调度租约')
+
+
+@db_connection()
 def auto_clean_logs():
     """自动清理超出限制的签到记录"""
-    db.connect(reuse_if_open=True)
-
     try:
         # 检查是否启用自动清理
-        auto_clean_config = Config.get_or_none(Config.key == 'auto_clean_logs')
-        if not auto_clean_config or auto_clean_config.value != 'true':
+        if get_config('auto_clean_logs') != 'true':
             logger.info('自动清理未启用，跳过')
             return
 
         # 获取最大记录数，添加类型验证
-        max_logs_config = Config.get_or_none(Config.key == 'max_logs_count')
         try:
-            max_logs = int(max_logs_config.value) if max_logs_config else 500
-        except (ValueError, AttributeError):
+            max_logs = int(get_config('max_logs_count', '500'))
+        except (ValueError, TypeError):
             max_logs = 500
             logger.warning('无效的 max_logs_count 配置，使用默认值 500')
 
@@ -557,17 +1256,28 @@ def auto_clean_logs():
                        .where(CheckinLog.id.in_(subquery))
                        .execute())
 
+        # 清理不再被引用的请求快照
+        purge_orphan_snapshots()
+
         logger.info(f'自动清理完成：删除了 {deleted} 条旧记录，保留最新 {max_logs} 条')
 
     except Exception as e:
         logger.error(f'自动清理失败: {e}')
 
-    finally:
-        db.close()
-
 
 def stop_scheduler():
     """停止调度器"""
     if scheduler.running:
         scheduler.shutdown()
+
+    # 释放调度租约，其他进程无需等待过期即可接管
+    if _lease is not None:
+        _lease.stop()
+
       #  logger.info('调度器已停止')
+
+    session_pool.close_all()
+    notify_dispatcher.stop()
+
+    if _engine is not None:
+        _engine.stop()
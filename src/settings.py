@@ -0,0 +1,212 @@
+"""运行参数配置（从环境变量读取）
+
+与数据库中的 Config 不同，这里的参数在进程启动时读取，
+用于执行引擎、连接池等需要在初始化阶段确定的调优项。
+"""
+import os
+from typing import Dict
+
+from dotenv import load_dotenv
+
+# 尽早加载 .env，保证各模块在导入时就能读到配置
+load_dotenv()
+
+
+def env_str(key: str, default: str = '') -> str:
+    """读取字符串配置"""
+    value = os.getenv(key)
+    return value.strip() if value is not None and value.strip() else default
+
+
+def env_int(key: str, default: int) -> int:
+    """读取整数配置，格式错误时使用默认值"""
+    try:
+        return int(env_str(key, str(default)))
+    except ValueError:
+        return default
+
+
+def env_float(key: str, default: float) -> float:
+    """读取浮点数配置，格式错误时使用默认值"""
+    try:
+        return float(env_str(key, str(default)))
+    except ValueError:
+        return default
+
+
+def env_map(key: str) -> Dict[str, str]:
+    """
+    读取键值对列表配置
+
+    格式: "key1=value1,key2=value2"，忽略格式错误的项。
+    """
+    result = {}
+    for item in env_str(key).split(','):
+        if '=' not in item:
+            continue
+        k, v = item.split('=', 1)
+        if k.strip() and v.strip():
+            result[k.strip().lower()] = v.strip()
+    return result
+
+
+# ==================== SQLite ====================
+
+# 日志模式：WAL 允许调度线程写入签到记录的同时，Web 界面并发读取
+SQLITE_JOURNAL_MODE = env_str('SQLITE_JOURNAL_MODE', 'wal')
+
+# 同步级别：WAL 模式下 normal 即可保证数据库一致性
+SQLITE_SYNCHRONOUS = env_str('SQLITE_SYNCHRONOUS', 'normal')
+
+# 遇到写锁时的等待时间（毫秒），避免直接抛出 "database is locked"
+SQLITE_BUSY_TIMEOUT = max(env_int('SQLITE_BUSY_TIMEOUT', 5000), 0)
+
+# 页缓存大小：负数表示 KiB（默认约 16MB）
+SQLITE_CACHE_SIZE = env_int('SQLITE_CACHE_SIZE', -16000)
+
+# 内存映射大小（字节，默认 64MB，0 表示关闭）
+SQLITE_MMAP_SIZE = max(env_int('SQLITE_MMAP_SIZE', 64 * 1024 * 1024), 0)
+
+
+# 连接池最大连接数（Web 请求线程、调度线程共享）
+DB_MAX_CONNECTIONS = max(env_int('DB_MAX_CONNECTIONS', 64), 1)
+
+# 空闲连接超过该秒数后重新建立
+DB_STALE_TIMEOUT = max(env_int('DB_STALE_TIMEOUT', 300), 0)
+
+# 连接池耗尽时等待空闲连接的秒数
+DB_POOL_TIMEOUT = max(env_int('DB_POOL_TIMEOUT', 10), 0)
+
+
+# 配置缓存有效期（秒）：本进程写入时立即失效，该值只影响其他进程修改后的生效延迟
+CONFIG_CACHE_TTL = max(env_float('CONFIG_CACHE_TTL', 60), 0)
+
+# 签到记录响应内容/请求体的压缩方式: none（默认，不压缩） / zlib / zstd（需 pip install zstandard）
+# 读取时按内容前缀自动识别，修改该值不影响已有记录
+LOG_COMPRESSION = env_str('LOG_COMPRESSION', 'none').lower()
+
+# 小于该字节数的内容不压缩（压缩收益低于格式开销）
+LOG_COMPRESSION_MIN_SIZE = max(env_int('LOG_COMPRESSION_MIN_SIZE', 256), 0)
+
+# 首页统计数据缓存有效期（秒）：修改账号或清除日志时立即失效，新的签到日志最多延迟该时间反映
+STATS_CACHE_TTL = max(env_float('STATS_CACHE_TTL', 10), 0)
+
+
+# ==================== 签到执行引擎 ====================
+
+# 执行引擎: thread（每个任务一个线程，默认） / async（所有任务共享一个事件循环） / process（请求分散到多个子进程）
+CHECKIN_ENGINE = env_str('CHECKIN_ENGINE', 'thread').lower()
+
+# process 引擎的子进程数（默认 CPU 核数）
+CHECKIN_PROCESSES = max(env_int('CHECKIN_PROCESSES', os.cpu_count() or 1), 1)
+
+# 签到请求默认超时（秒）
+CHECKIN_TIMEOUT = env_float('CHECKIN_TIMEOUT', 30)
+
+# 按目标主机覆盖超时，如 "bbs.example.com=10,pan.example.com=60"
+CHECKIN_HOST_TIMEOUTS = {host: float(v) for host, v in env_map('CHECKIN_HOST_TIMEOUTS').items()
+                         if v.replace('.', '', 1).isdigit()}
+
+
+
+def _parse_host_limit(value: str):
+    """解析 "最大并发/最小间隔秒数"（间隔可省略），格式错误时返回 None"""
+    concurrency, _, interval = value.partition('/')
+    try:
+        return max(int(concurrency or 0), 0), max(float(interval or 0), 0)
+    except ValueError:
+        return None
+
+
+# 按目标主机限制签到请求，格式 "主机=最大并发/最小间隔秒数"，* 为默认值，0 表示不限制
+# 如 "*=4/0.5,bbs.example.com=1/2"：每个主机最多 4 个并发、间隔 0.5 秒，bbs.example.com 逐个发起、间隔 2 秒
+HOST_LIMITS = {host: limit for host, limit in
+               ((host, _parse_host_limit(v)) for host, v in env_map('HOST_LIMITS').items()) if limit}
+
+# curl 解析结果缓存条数
+CURL_PARSE_CACHE_SIZE = max(env_int('CURL_PARSE_CACHE_SIZE', 1024), 1)
+
+# async 引擎同时进行的最大请求数
+ASYNC_CONCURRENCY = max(env_int('ASYNC_CONCURRENCY', 100), 1)
+
+
+def checkin_timeout_for(host: str) -> float:
+    """获取目标主机的请求超时"""
+    return CHECKIN_HOST_TIMEOUTS.get((host or '').lower(), CHECKIN_TIMEOUT)
+
+
+# ==================== 调度器 ====================
+
+# 调度器工作线程数：thread 引擎下即同时进行的最大签到数（async/process 引擎下任务提交后立即返回，无需调大）
+SCHEDULER_POOL_SIZE = max(env_int('SCHEDULER_POOL_SIZE', 10), 1)
+
+# 同一时刻到期的标准 Cron 账号分散执行的时间范围（秒）：每个账号按 ID 固定延后 0 ~ 该值秒，0 表示不分散
+CRON_SPREAD_SECONDS = max(env_int('CRON_SPREAD_SECONDS', 0), 0)
+
+# 定时任务与账号表的同步间隔（秒），用于发现其他进程对账号的修改；0 表示只在启动时同步
+RECONCILE_INTERVAL = max(env_int('RECONCILE_INTERVAL', 60), 0)
+
+# 定时任务存储: memory（默认，启动时按账号表重建） / sqlalchemy（保存在数据库中，重启后保留未执行的任务，需 pip install sqlalchemy）
+SCHEDULER_JOBSTORE = env_str('SCHEDULER_JOBSTORE', 'memory').lower()
+
+# sqlalchemy 任务存储的数据库地址，默认使用 data/acgo.db 中的 apscheduler_jobs 表
+SCHEDULER_JOBSTORE_URL = env_str('SCHEDULER_JOBSTORE_URL')
+
+# 错过执行时间后仍补执行的宽限（秒，账号未单独设置时使用），超过则跳过本次；0 表示不限制
+SCHEDULER_MISFIRE_GRACE_TIME = max(env_int('SCHEDULER_MISFIRE_GRACE_TIME', 300), 0)
+
+# 调度角色: auto（默认，多个进程竞争调度权，只有持有租约的进程执行定时签到） / web（只提供 Web 服务，从不执行定时签到）
+SCHEDULER_ROLE = env_str('SCHEDULER_ROLE', 'auto').lower()
+
+# 调度租约有效期（秒）：持有者每 1/3 有效期续约一次，进程退出或失联后最迟该时间内由其他进程接管
+SCHEDULER_LEASE_TTL = max(env_int('SCHEDULER_LEASE_TTL', 30), 3)
+
+
+# ==================== HTTP 连接池 ====================
+
+# 每个会话缓存的连接池数量（重定向到其他主机时使用）
+HTTP_POOL_CONNECTIONS = max(env_int('HTTP_POOL_CONNECTIONS', 4), 1)
+
+# 每个目标主机保持的最大 keep-alive 连接数
+HTTP_POOL_MAXSIZE = max(env_int('HTTP_POOL_MAXSIZE', 10), 1)
+
+# 会话空闲多久后回收（秒）
+HTTP_POOL_IDLE_TIMEOUT = env_float('HTTP_POOL_IDLE_TIMEOUT', 300)
+
+
+# ==================== 通知分发 ====================
+
+# 通知分发工作线程数（每条通知再按渠道并行发送）
+NOTIFY_WORKERS = max(env_int('NOTIFY_WORKERS', 4), 1)
+
+# 待发送通知队列上限，超出时转入数据库重试队列
+NOTIFY_QUEUE_SIZE = max(env_int('NOTIFY_QUEUE_SIZE', 1000), 1)
+
+# 内存中保留的最近投递结果条数
+NOTIFY_HISTORY_SIZE = max(env_int('NOTIFY_HISTORY_SIZE', 200), 1)
+
+# 通知请求默认超时（秒），可按渠道覆盖，如 "telegram=5,webhook=15"
+NOTIFY_TIMEOUT = env_float('NOTIFY_TIMEOUT', 10)
+NOTIFY_CHANNEL_TIMEOUTS = {channel: float(v) for channel, v in env_map('NOTIFY_CHANNEL_TIMEOUTS').items()
+                           if v.replace('.', '', 1).isdigit()}
+
+# 各渠道每分钟最多发送条数（令牌桶限速，0 表示不限制），可覆盖，如 "dingtalk=20,telegram=30"
+# 默认值参考各平台机器人限制：钉钉/企业微信 20 条/分钟，飞书 100 条/分钟，Telegram 群组 20 条/分钟
+# 限速按进程计算：多个进程（如 gunicorn 多 worker）同时发送签到通知时，实际速率为各进程之和，需按进程数调低；
+# 重试队列只由持有调度租约的进程发送
+NOTIFY_RATE_LIMITS = {'webhook': 0, 'telegram': 20, 'dingtalk': 20, 'wecom': 20, 'feishu': 100}
+NOTIFY_RATE_LIMITS.update({channel: int(v) for channel, v in env_map('NOTIFY_RATE_LIMITS').items() if v.isdigit()})
+
+# 等待发送令牌的最长秒数，超过则转入重试队列稍后发送
+NOTIFY_RATE_WAIT = max(env_float('NOTIFY_RATE_WAIT', 5), 0)
+
+# 发送失败的通知最多重试次数（重试队列保存在数据库中，重启后继续）
+NOTIFY_MAX_RETRIES = max(env_int('NOTIFY_MAX_RETRIES', 5), 1)
+
+# 重试队列检查间隔（秒），也是首次重试的基础延迟（之后按指数增加）
+NOTIFY_RETRY_INTERVAL = max(env_int('NOTIFY_RETRY_INTERVAL', 30), 1)
+
+
+def notify_timeout_for(channel: str) -> float:
+    """获取通知渠道的请求超时"""
+    return NOTIFY_CHANNEL_TIMEOUTS.get(channel, NOTIFY_TIMEOUT)
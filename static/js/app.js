@@ -1,6 +1,8 @@
 // 全局变量
 let currentPage = 1;
 let totalPages = 1;
+let logCursors = [''];  // 每一页的起始游标（logCursors[i] 对应第 i+1 页）
+let logTotal = 0;
 
 // HTML 转义函数（防止 XSS）
 function escapeHtml(text) {
@@ -41,6 +43,25 @@ function showResponseDetail(element) {
     document.body.style.overflow = 'hidden';  // 禁止背景滚动
 }
 
+// 显示日志的完整响应内容（列表只包含预览，完整内容按需加载）
+async function showLogResponse(logId) {
+    try {
+        const res = await fetch(`/api/logs/${logId}`);
+        const data = await res.json();
+
+        if (!data.success) {
+            alert('获取响应内容失败: ' + data.message);
+            return;
+        }
+
+        document.getElementById('responseContent').textContent = data.data.response_body || '';
+        document.getElementById('responseModal').style.display = 'block';
+        document.body.style.overflow = 'hidden';  // 禁止背景滚动
+    } catch (error) {
+        alert('获取响应内容失败: ' + error.message);
+    }
+}
+
 // 关闭响应详情模态框
 function closeResponseModal() {
     document.getElementById('responseModal').style.display = 'none';
@@ -108,7 +129,10 @@ async function loadAccounts() {
                 <tr>
                     <td>${acc.id}</td>
                     <td>${acc.name}</td>
-                    <td>${acc.cron_expr}</td>
+                    <td>
+                        ${acc.cron_expr}
+                        ${acc.next_run_time ? `<small style="display: block; color: var(--muted-foreground);">下次执行: ${acc.next_run_time}</small>` : ''}
+                    </td>
                     <td>${acc.retry_count}</td>
                     <td>${acc.retry_interval}</td>
                     <td>
@@ -136,8 +160,18 @@ async function loadLogsPage(page) {
     if (page < 1) return;
 
     try {
+        // 回到第一页（筛选或刷新）时重置游标，并重新获取总数
+        if (page === 1) {
+            logCursors = [''];
+        }
+        if (page > logCursors.length) return;
+
         const statusFilter = document.getElementById('statusFilter').value;
-        const url = `/api/logs?page=${page}&page_size=10${statusFilter ? '&status=' + statusFilter : ''}`;
+        const params = new URLSearchParams({cursor: logCursors[page - 1], page_size: 10});
+        if (statusFilter) params.set('status', statusFilter);
+        if (page === 1) params.set('with_total', '1');
+
+        const url = `/api/logs?${params.toString()}`;
         const res = await fetch(url);
         const data = await res.json();
 
@@ -161,8 +195,8 @@ async function loadLogsPage(page) {
                     </td>
                     <td>${formatResponseCode(log.response_code)}</td>
                     <td>
-                        ${log.response_body ?
-                            `<span class="clickable" data-content="${escapeHtml(log.response_body)}" onclick="showResponseDetail(this)" title="点击查看完整内容">${escapeHtml(log.response_body.substring(0, 50))}...</span>`
+                        ${log.response_preview ?
+                            `<span class="clickable" onclick="showLogResponse(${log.id})" title="点击查看完整内容">${escapeHtml(log.response_preview.substring(0, 50))}...</span>`
                             : '-'}
                     </td>
                     <td>
@@ -177,13 +211,20 @@ async function loadLogsPage(page) {
                 </tr>
             `).join('');
 
-            // 更新分页信息
+            // 更新分页信息（总数只在第一页查询一次）
             currentPage = page;
-            totalPages = Math.ceil(data.total / data.page_size);
+            if (data.total !== undefined) {
+                logTotal = data.total;
+            }
+            totalPages = Math.max(Math.ceil(logTotal / data.page_size), 1);
+            logCursors.length = page;
+            if (data.next_cursor) {
+                logCursors.push(data.next_cursor);
+            }
 
-            document.getElementById('pageInfo').textContent = `第 ${currentPage} 页 / 共 ${totalPages} 页 (总计 ${data.total} 条)`;
+            document.getElementById('pageInfo').textContent = `第 ${currentPage} 页 / 共 ${totalPages} 页 (总计 ${logTotal} 条)`;
             document.getElementById('prevBtn').disabled = currentPage <= 1;
-            document.getElementById('nextBtn').disabled = currentPage >= totalPages;
+            document.getElementById('nextBtn').disabled = !data.next_cursor;
             document.getElementById('logsPagination').style.display = 'flex';
         }
     } catch (error) {
@@ -228,6 +269,9 @@ async function editAccount(id) {
                 document.getElementById('retryCount').value = account.retry_count;
                 document.getElementById('retryInterval').value = account.retry_interval;
                 document.getElementById('enabled').checked = account.enabled;
+                document.getElementById('misfireGraceTime').value = account.misfire_grace_time ?? '';
+                document.getElementById('coalesce').checked = account.coalesce;
+                document.getElementById('maxInstances').value = account.max_instances;
                 document.getElementById('accountModal').style.display = 'block';
                 document.body.style.overflow = 'hidden';  // 禁止背景滚动
             }
@@ -254,7 +298,11 @@ document.getElementById('accountForm').addEventListener('submit', async function
         cron_expr: document.getElementById('cronExpr').value,
         retry_count: parseInt(document.getElementById('retryCount').value),
         retry_interval: parseInt(document.getElementById('retryInterval').value),
-        enabled: document.getElementById('enabled').checked
+        enabled: document.getElementById('enabled').checked,
+        misfire_grace_time: document.getElementById('misfireGraceTime').value === ''
+            ? null : parseInt(document.getElementById('misfireGraceTime').value),
+        coalesce: document.getElementById('coalesce').checked,
+        max_instances: parseInt(document.getElementById('maxInstances').value)
     };
 
     try {
@@ -501,14 +549,48 @@ async function exportAccounts() {
     }
 }
 
+// 导入 NDJSON 账号文件
+async function importAccountsNdjson(file) {
+    if (!confirm(`确定要导入 ${file.name} 中的账号吗？\n\n重名账号将自动重命名。`)) {
+        return;
+    }
+
+    try {
+        const res = await fetch('/api/accounts/import', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/x-ndjson'},
+            body: file
+        });
+
+        const data = await res.json();
+
+        if (data.success) {
+            alert(`导入完成！\n\n成功: ${data.imported} 个\n失败: ${data.failed} 个\n重命名: ${data.renamed} 个`);
+            loadAccounts();
+            loadStats();
+        } else {
+            alert('导入失败: ' + data.message);
+        }
+    } catch (error) {
+        alert('导入失败: ' + error.message);
+    }
+}
+
 // 导入账号
 async function importAccounts(event) {
     const file = event.target.files[0];
     if (!file) return;
 
+    // NDJSON 文件（每行一个账号）直接上传，由服务端流式解析
+    if (file.name.endsWith('.ndjson') || file.name.endsWith('.jsonl')) {
+        await importAccountsNdjson(file);
+        event.target.value = '';
+        return;
+    }
+
     // 验证文件类型
     if (!file.name.endsWith('.json')) {
-        alert('请选择 JSON 文件');
+        alert('请选择 JSON 或 NDJSON 文件');
         event.target.value = '';
         return;
     }
@@ -126,6 +126,11 @@ async function loadNotifyChannels() {
             document.getElementById('feishuEnabled').checked = cfg.feishu_enabled || false;
             document.getElementById('feishuWebhookUrl').value = cfg.feishu_webhook_url || '';
             document.getElementById('feishuSecret').value = cfg.feishu_secret || '';
+
+            // 汇总推送
+            document.getElementById('digestEnabled').checked = cfg.digest_enabled || false;
+            document.getElementById('digestWindow').value = cfg.digest_window || 60;
+            document.getElementById('digestFailuresImmediate').checked = cfg.digest_failures_immediate === 'true';
         }
     } catch (error) {
         console.error('加载通知渠道配置失败:', error);
@@ -155,7 +160,12 @@ async function saveNotifyChannelsQuiet() {
         // 飞书
         feishu_enabled: document.getElementById('feishuEnabled').checked,
         feishu_webhook_url: document.getElementById('feishuWebhookUrl').value.trim(),
-        feishu_secret: document.getElementById('feishuSecret').value.trim()
+        feishu_secret: document.getElementById('feishuSecret').value.trim(),
+
+        // 汇总推送
+        digest_enabled: document.getElementById('digestEnabled').checked,
+        digest_window: document.getElementById('digestWindow').value.trim() || '60',
+        digest_failures_immediate: document.getElementById('digestFailuresImmediate').checked
     };
 
     try {
@@ -212,6 +222,22 @@ async function saveFeishu() {
     }
 }
 
+// 保存汇总推送配置
+async function saveDigest() {
+    const windowSeconds = parseInt(document.getElementById('digestWindow').value, 10);
+    if (document.getElementById('digestWindow').value && (isNaN(windowSeconds) || windowSeconds < 1)) {
+        alert('汇总窗口必须是大于 0 的整数');
+        return;
+    }
+
+    const result = await saveNotifyChannelsQuiet();
+    if (result.success) {
+        alert('汇总推送配置保存成功');
+    } else {
+        alert('保存失败: ' + result.message);
+    }
+}
+
 // 测试 Telegram
 async function testTelegram() {
     const botToken = document.getElementById('telegramBotToken').value.trim();